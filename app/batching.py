@@ -0,0 +1,159 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from .inference import extract_inference_batch
+from .workers import INFERENCE_WORKERS, PoolFullError
+
+BATCH_MAX_SIZE = int(os.getenv("INFERENCE_BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("INFERENCE_BATCH_MAX_WAIT_MS", "5"))
+# Items allowed to wait for a batch before new submissions are refused.
+BATCH_QUEUE_SIZE = int(os.getenv("INFERENCE_BATCH_QUEUE_SIZE", "32"))
+# Threads running batches, so the OCR of one batch overlaps the detection of the next.
+BATCH_WORKERS = int(os.getenv("INFERENCE_BATCH_WORKERS", str(INFERENCE_WORKERS)))
+
+
+class MicroBatcher:
+    """
+    Combine single-item requests that arrive close together into one batch.
+
+    Items submitted from any thread are queued. A background thread takes the
+    first waiting item, keeps collecting until `max_batch_size` items are
+    gathered or `max_wait_ms` has elapsed, and runs `process_batch` once on the
+    whole group. Up to `max_workers` batches run at once.
+
+    Parameters
+    ----------
+    process_batch : callable
+        Function taking a list of items and returning a list of outputs in the
+        same order.
+    max_batch_size : int, optional
+        Maximum number of items per batch. Default is `BATCH_MAX_SIZE`.
+    max_wait_ms : float, optional
+        How long the first item of a batch waits for company, in milliseconds.
+        Default is `BATCH_MAX_WAIT_MS`.
+    max_queue_size : int, optional
+        Number of items allowed to wait for a batch. Default is `BATCH_QUEUE_SIZE`.
+    max_workers : int, optional
+        Number of threads running batches. Default is `BATCH_WORKERS`.
+
+    Notes
+    -----
+    - Only one thread collects a batch at a time, so items arriving together
+      still share one batch while the other threads process earlier batches.
+    - If a batch raises, its items are retried one by one so that a single bad
+      input only fails its own request.
+    - Callers on the event loop should use `run`. Blocking a worker thread on
+      each item would cap the batch size at the number of workers.
+    """
+
+    def __init__(
+        self,
+        process_batch,
+        max_batch_size=BATCH_MAX_SIZE,
+        max_wait_ms=BATCH_MAX_WAIT_MS,
+        max_queue_size=BATCH_QUEUE_SIZE,
+        max_workers=BATCH_WORKERS,
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.max_workers = max(1, max_workers)
+        self._queue = queue.Queue(maxsize=max(1, max_queue_size))
+        self._threads = []
+        self._lock = threading.Lock()
+        self._collect_lock = threading.Lock()
+
+    def submit(self, item):
+        """
+        Queue an item for the next batch.
+
+        Parameters
+        ----------
+        item : object
+            The input to process, e.g. an image path or a decoded image.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Future resolved with the output for this item.
+
+        Raises
+        ------
+        PoolFullError
+            If `max_queue_size` items are already waiting.
+        """
+        self._ensure_started()
+        future = Future()
+        try:
+            self._queue.put_nowait((item, future))
+        except queue.Full:
+            raise PoolFullError() from None
+        return future
+
+    async def run(self, item):
+        """
+        Queue an item for the next batch and await its output.
+
+        Raises
+        ------
+        PoolFullError
+            If `max_queue_size` items are already waiting.
+        """
+        return await asyncio.wrap_future(self.submit(item))
+
+    def _ensure_started(self):
+        if not self._threads:
+            with self._lock:
+                if not self._threads:
+                    for index in range(self.max_workers):
+                        thread = threading.Thread(
+                            target=self._run, name=f"inference-batcher-{index}", daemon=True
+                        )
+                        thread.start()
+                        self._threads.append(thread)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        # Futures cancelled while waiting in the queue are dropped from the batch
+        return [
+            (item, future)
+            for item, future in batch
+            if future.set_running_or_notify_cancel()
+        ]
+
+    def _run(self):
+        while True:
+            with self._collect_lock:
+                batch = self._collect()
+            if not batch:
+                continue
+            try:
+                outputs = self.process_batch([item for item, _ in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                    continue
+                for item, future in batch:
+                    try:
+                        future.set_result(self.process_batch([item])[0])
+                    except Exception as item_error:
+                        future.set_exception(item_error)
+            else:
+                for (_, future), output in zip(batch, outputs):
+                    future.set_result(output)
+
+
+inference_batcher = MicroBatcher(extract_inference_batch)
@@ -0,0 +1,194 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .metrics import cache_lookups
+
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+# Seconds a cached result stays valid, 0 keeps results until they are evicted.
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "86400"))
+# Path of the optional SQLite tier, unset keeps the cache in memory only.
+RESULT_CACHE_DB = os.getenv("RESULT_CACHE_DB")
+RESULT_CACHE_DB_SIZE = int(os.getenv("RESULT_CACHE_DB_SIZE", "100000"))
+
+
+class ResultCache:
+    """
+    Two-tier cache of OCR results keyed by image content and model version.
+
+    The first tier is an in-memory LRU. The optional second tier is a SQLite
+    table that survives restarts and is shared by worker processes. A memory
+    miss that hits the SQLite tier is promoted back into memory.
+
+    Parameters
+    ----------
+    max_size : int, optional
+        Maximum number of entries in memory, 0 disables the memory tier.
+        Default is `RESULT_CACHE_SIZE`.
+    ttl : float, optional
+        Lifetime of an entry in seconds, 0 disables expiry. Default is `RESULT_CACHE_TTL`.
+    db_path : str, optional
+        Path of the SQLite tier. Default is `RESULT_CACHE_DB`, None disables it.
+    db_max_size : int, optional
+        Maximum number of entries in the SQLite tier. Default is `RESULT_CACHE_DB_SIZE`.
+
+    Notes
+    -----
+    Values must be JSON serializable, as they are stored as JSON in SQLite.
+    """
+
+    # Number of writes between two size checks of the SQLite tier.
+    PRUNE_INTERVAL = 100
+
+    def __init__(
+        self,
+        max_size=RESULT_CACHE_SIZE,
+        ttl=RESULT_CACHE_TTL,
+        db_path=RESULT_CACHE_DB,
+        db_max_size=RESULT_CACHE_DB_SIZE,
+    ):
+        self.max_size = max(0, max_size)
+        self.ttl = max(0.0, ttl)
+        self.db_max_size = max(1, db_max_size)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS result_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(content_hash, model_version):
+        """
+        Build the cache key of an image for a given model.
+
+        Parameters
+        ----------
+        content_hash : str
+            SHA-256 hex digest of the image bytes.
+        model_version : str
+            Fingerprint of the detector weights, e.g. `registry.weights_version`.
+
+        Returns
+        -------
+        str
+            The cache key.
+        """
+        return f"{model_version}:{content_hash}"
+
+    def get(self, key):
+        """
+        Return the cached value for `key`, or None on a miss.
+        """
+        value = self._get(key)
+        cache_lookups.inc(result="miss" if value is None else "hit")
+        return value
+
+    def _get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM result_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and (row[1] is None or row[1] > now):
+                    value = json.loads(row[0])
+                    self._store(key, value, row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        """
+        Store `value` under `key` in every enabled tier.
+        """
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._store(key, value, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO result_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at),
+                )
+                self._writes += 1
+                if self._writes % self.PRUNE_INTERVAL == 0:
+                    self._prune_db()
+                self._db.commit()
+
+    def clear(self):
+        """
+        Drop every entry from both tiers. Counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM result_cache")
+                self._db.commit()
+
+    def stats(self):
+        """
+        Return hit/miss counters and the current memory tier size.
+
+        Returns
+        -------
+        dict
+            A dictionary with 'hits', 'disk_hits', 'misses', 'hit_rate', 'size'
+            and 'max_size'.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+            }
+
+    def _store(self, key, value, expires_at):
+        if not self.max_size:
+            return
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _prune_db(self):
+        self._db.execute(
+            "DELETE FROM result_cache WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (time.time(),),
+        )
+        (count,) = self._db.execute("SELECT COUNT(*) FROM result_cache").fetchone()
+        if count > self.db_max_size:
+            self._db.execute(
+                "DELETE FROM result_cache WHERE key IN "
+                "(SELECT key FROM result_cache ORDER BY expires_at LIMIT ?)",
+                (count - self.db_max_size,),
+            )
+
+
+result_cache = ResultCache()
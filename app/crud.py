@@ -1,9 +1,69 @@
 import os
-from fastapi import UploadFile
+import io
+import asyncio
+import csv
 import json
+import hashlib
+import logging
+import tempfile
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 from .models import IdentityCard
+from .schemas import IdentityCardRequest
+from .database import SessionLocal
 from datetime import date, datetime
-from .inference import extract_inference
+from .inference import extract_inference, extract_inference_batch
+from .batching import inference_batcher, BATCH_MAX_SIZE
+from .jobs import job_store, JobNotFoundError
+from .workers import inference_pool, PoolFullError
+from .cache import result_cache
+from .model_registry import registry
+from .metrics import stage_seconds, inference_failures
+from .validators import parse_birth_date, validate_identity_fields
+from .preprocessing import load_image
+
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Files accepted by one batch request, whose decoded images are all held in memory at once.
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "16"))
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".webp"}
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "50"))
+LIST_MAX_PAGE_SIZE = int(os.getenv("LIST_MAX_PAGE_SIZE", "500"))
+# Rows fetched from the database cursor and sent per chunk by the export.
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+EXPORT_COLUMNS = ("id", "identity_number", "surname", "name", "birth_date", "created_at")
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+# Cards written per transaction by the bulk save.
+BULK_SAVE_BATCH_SIZE = int(os.getenv("BULK_SAVE_BATCH_SIZE", "1000"))
+# Dialects with INSERT ... ON CONFLICT, which makes the bulk save race free.
+UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+# Refuse to save a card whose identity number or birth date fails validation.
+# By default such cards are saved and the errors are logged and reported.
+REJECT_INVALID_FIELDS = os.getenv("REJECT_INVALID_FIELDS", "0") == "1"
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the configured maximum size."""
+
+    def __init__(self, max_bytes):
+        super().__init__(f"Upload exceeds the maximum size of {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+class DuplicateIdentityCardError(Exception):
+    """Raised when saving a card whose identity number is already saved."""
+
+    def __init__(self, identity_number):
+        super().__init__(f"Identity number {identity_number} is already saved")
+        self.identity_number = identity_number
 
 
 def create_upload_directory():
@@ -25,172 +85,1004 @@ def create_upload_directory():
     return file_dir
 
 
-def delete_existing_png_files(file_dir):
+def iter_upload_chunks(file: UploadFile, max_bytes=MAX_UPLOAD_BYTES):
+    """
+    Read an upload in fixed-size chunks while enforcing a size limit.
+
+    Parameters
+    ----------
+    file : UploadFile
+        The uploaded file from FastAPI.
+    max_bytes : int, optional
+        Maximum accepted upload size. Default is `MAX_UPLOAD_BYTES`.
+
+    Yields
+    ------
+    bytes
+        The next chunk, at most `UPLOAD_CHUNK_SIZE` bytes.
+
+    Raises
+    ------
+    UploadTooLargeError
+        As soon as more than `max_bytes` bytes have been read.
     """
-    Delete all PNG files in the specified directory.
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLargeError(max_bytes)
+
+    total = 0
+    while True:
+        chunk = file.file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLargeError(max_bytes)
+        yield chunk
+
 
-    Searches the given directory and removes files with the `.png` extension
-    to ensure no conflicting images remain before new uploads.
+def stage_uploaded_file(file: UploadFile, file_dir, max_bytes=MAX_UPLOAD_BYTES):
+    """
+    Stream an uploaded file to a temporary file and name it after its content hash.
 
     Parameters
     ----------
+    file : UploadFile
+        The uploaded file from FastAPI.
     file_dir : str
-        Path to the directory containing uploaded files.
+        Directory where the file is saved.
+    max_bytes : int, optional
+        Maximum accepted upload size. Default is `MAX_UPLOAD_BYTES`.
 
     Returns
     -------
-    None
+    tuple
+        A tuple containing the temporary path the upload was written to, the
+        path it must be moved to, and the SHA-256 hex digest of its content.
+
+    Raises
+    ------
+    UploadTooLargeError
+        If the upload exceeds `max_bytes`. Nothing is left on disk.
+
+    Notes
+    -----
+    - The upload is copied in fixed-size chunks, so memory use does not grow
+      with the file size.
+    - The client-supplied filename only contributes its extension. The file is
+      named `<sha256><extension>`, so re-uploading the same image reuses the
+      same file.
+    - The upload is left at the temporary path. `JobStore.create` moves it in
+      place under the job store lock, so a job releasing the same file cannot
+      delete it in between.
     """
+    extension = os.path.splitext(file.filename or "")[1].lower()
+    if extension not in IMAGE_EXTENSIONS:
+        extension = ".png"
+
+    content_hash = hashlib.sha256()
+    with stage_seconds.time(stage="upload"), tempfile.NamedTemporaryFile(
+        dir=file_dir, suffix=".part", delete=False
+    ) as sample_file:
+        try:
+            for chunk in iter_upload_chunks(file, max_bytes):
+                content_hash.update(chunk)
+                sample_file.write(chunk)
+        except BaseException:
+            sample_file.close()
+            os.remove(sample_file.name)
+            raise
 
-    for filename in os.listdir(file_dir):
-        if filename.endswith(".png"):
-            os.remove(os.path.join(file_dir, filename))
+    digest = content_hash.hexdigest()
+    file_path = os.path.join(file_dir, f"{digest}{extension}").replace("\\", "/")
 
+    return sample_file.name, file_path, digest
 
-def save_uploaded_file(file: UploadFile, file_dir):
+
+def create_upload_job(file: UploadFile, status="uploaded"):
     """
-    Save uploaded file to disk.
+    Save an uploaded identity card image and register a job for it.
 
     Parameters
     ----------
     file : UploadFile
-        The uploaded file from FastAPI.
+        The uploaded image file from FastAPI.
+    status : str, optional
+        Initial status of the job. Default is "uploaded".
+
+    Returns
+    -------
+    tuple
+        A tuple containing the job id and the path of the saved image.
+    """
+    file_dir = create_upload_directory()
+    staged_path, file_path, content_hash = stage_uploaded_file(file, file_dir)
+    try:
+        job_id = job_store.create(
+            image_path=file_path,
+            content_hash=content_hash,
+            status=status,
+            staged_path=staged_path,
+        )
+    except BaseException:
+        if os.path.exists(staged_path):
+            os.remove(staged_path)
+        raise
+    return job_id, file_path
+
+
+def identity_field_errors(identity_number, birth_date):
+    """
+    Validate the numeric fields of a card about to be saved.
+
+    Parameters
+    ----------
+    identity_number : str
+        The identity number of the card.
+    birth_date : str
+        The birth date of the card, as read or in ISO format.
+
+    Returns
+    -------
+    dict
+        The error message of each invalid field, see `validators.validate_identity_fields`.
+
+    Notes
+    -----
+    Both the single and the bulk save call it, and refuse cards with errors
+    only when `REJECT_INVALID_FIELDS` is set. Otherwise the errors are logged
+    and the card is saved.
+    """
+    errors = validate_identity_fields(identity_number, birth_date)
+    if errors and not REJECT_INVALID_FIELDS:
+        logger.warning("Saving identity card with invalid fields: %s", errors)
+    return errors
+
+
+def save_identity_card_from_job(job_id):
+    """
+    Build an IdentityCard object from the inference result of a job.
+
+    Parameters
+    ----------
+    job_id : str
+        The job id returned by the upload step.
+
+    Returns
+    -------
+    IdentityCard
+        A SQLAlchemy IdentityCard object containing the parsed inference result data
+        (not yet committed to the database).
+
+    Raises
+    ------
+    JobNotFoundError
+        If the job id is unknown.
+    ValueError
+        If inference has not been run for the job yet, if the identity number
+        or the birth date is invalid and `REJECT_INVALID_FIELDS` is set, or if
+        a field cannot be stored at all. The message names the failing fields.
+
+    Notes
+    -----
+    Without `REJECT_INVALID_FIELDS`, a card failing the numeric checks is still
+    saved as long as it can be stored: the birth date must be a calendar date
+    and every field must meet the `schemas.Identity` constraints. Those are
+    checked here, before anything is written.
+    """
+    data = job_store.get(job_id)["result"]
+    if data is None:
+        raise ValueError(f"No inference result for job {job_id}, run inference first")
+
+    birth_date = parse_birth_date(data["birth_date"])
+    if birth_date is None:
+        # Future and pre-1900 dates fail validation but can still be stored
+        try:
+            birth_date = datetime.strptime(data["birth_date"], "%Y-%m-%d").date()
+        except ValueError:
+            raise ValueError(
+                f"Invalid inference result: birth_date {data['birth_date']!r} "
+                "is not a date and cannot be saved"
+            ) from None
+    try:
+        fields = IdentityCardRequest(
+            identity_number=data["identity_number"],
+            surname=data["surname"],
+            name=data["name"],
+            birth_date=birth_date,
+        )
+    except ValidationError as e:
+        raise ValueError(
+            "Invalid inference result: "
+            + "; ".join(
+                f"{'.'.join(map(str, error['loc']))} {error['msg']}"
+                for error in e.errors()
+            )
+        ) from None
+
+    # Checked once the card is known to be storable, so a card refused above
+    # is not also logged as saved with invalid fields
+    errors = identity_field_errors(data["identity_number"], data["birth_date"])
+    if errors and REJECT_INVALID_FIELDS:
+        raise ValueError(
+            "Invalid inference result: "
+            + "; ".join(f"{field} {error}" for field, error in errors.items())
+        )
+
+    identity_card = IdentityCard(
+        identity_number=fields.identity_number,
+        surname=fields.surname,
+        name=fields.name,
+        birth_date=fields.birth_date,
+        created_at=date.today(),
+    )
+    return identity_card
 
 
+async def show_inference_result(job_id):
+    """
+    Run inference on the image uploaded for a job and extract identity information.
+
+    The result is stored on the job so the save step can pick it up.
+
+    Parameters
+    ----------
+    job_id : str
+        The job id returned by the upload step.
+
+    Returns
+    -------
+    dict
+        Dictionary containing extracted identity fields:
+        'identity_number', 'surname', 'name', and 'birth_date'.
+
+    Raises
+    ------
+    JobNotFoundError
+        If the job id is unknown.
+    PoolFullError
+        If the micro-batcher queue is full. The job is left as it was, so the
+        request can be retried.
+    Exception
+        Any inference error, after it is recorded on the job as "failed".
+    """
+    job = job_store.get(job_id)
+    # A running job is not evicted, so its image stays until the batcher reads it
+    job_store.update(job_id, status="detecting")
+
+    # Awaited on the event loop rather than from a worker thread, so every
+    # concurrent request can join the same micro-batch and YOLO forward pass.
+    try:
+        extracted_texts = await async_cached_inference(
+            job["content_hash"], lambda: inference_batcher.run(job["image_path"])
+        )
+    except (PoolFullError, asyncio.CancelledError):
+        # Nothing ran to completion, the request can be retried
+        job_store.update(job_id, status=job["status"])
+        raise
+    except Exception as e:
+        job_store.update(job_id, status="failed", error=str(e))
+        raise
+    result = format_inference_result(extracted_texts)
+    job_store.update(job_id, status="done", result=result)
+    return result
+
+
+def run_inference_job(job_id):
+    """
+    Run inference for a queued job and record its progress on the job.
+
+    The job status moves through "detecting" and "ocr" to "done" with the
+    result, or to "failed" with the error message.
+
+    Parameters
+    ----------
+    job_id : str
+        The id of a job created by `submit_inference_job`.
+    """
+    try:
+        job = job_store.get(job_id)
+        extracted_texts = cached_inference(
+            job["content_hash"],
+            lambda: extract_inference(
+                job["image_path"],
+                on_stage=lambda stage: job_store.update(job_id, status=stage),
+            ),
+        )
+        job_store.update(
+            job_id, status="done", result=format_inference_result(extracted_texts)
+        )
+    except Exception as e:
+        try:
+            job_store.update(job_id, status="failed", error=str(e))
+        except JobNotFoundError:
+            # The job was evicted meanwhile, nobody can read the error anymore
+            logger.warning("Inference job %s was evicted before it finished: %s", job_id, e)
+
+
+def submit_inference_job(file: UploadFile):
+    """
+    Save an uploaded image and queue its inference on the worker pool.
+
+    Parameters
+    ----------
+    file : UploadFile
+        The uploaded identity card image.
+
     Returns
     -------
     str
-        The file path where the uploaded file was saved.
+        The id of the queued job.
+
+    Raises
+    ------
+    PoolFullError
+        If the worker pool queue is full. The upload is discarded.
     """
+    # Created as queued, so the job cannot be evicted before a worker runs it
+    job_id, _ = create_upload_job(file, status="queued")
+    try:
+        inference_pool.submit(run_inference_job, job_id)
+    except PoolFullError:
+        job_store.delete(job_id)
+        raise
+    return job_id
 
-    file_path = os.path.join(file_dir, file.filename).replace("\\", "/")
 
-    with open(file_path, "wb") as sample_file:
-        sample_file.write(file.file.read())
+def format_inference_result(extracted_texts):
+    """
+    Map OCR field labels to the identity card fields returned by the API.
+
+    Parameters
+    ----------
+    extracted_texts : dict
+        OCR results keyed by field label, as returned by `extract_inference`.
 
-    return file_path
+    Returns
+    -------
+    dict
+        Dictionary containing 'identity_number', 'surname', 'name', 'birth_date'
+        and 'field_errors'. A valid birth date is given in ISO format whether
+        the card prints it year or day first. 'field_errors' holds the message
+        of each numeric field failing validation, so the user can correct it
+        before saving.
+    """
+    birth_date = parse_birth_date(extracted_texts["birth_date"])
+    result = {
+        "identity_number": extracted_texts["id_number"],
+        "surname": extracted_texts["surname"],
+        "name": extracted_texts["name"],
+        "birth_date": (
+            birth_date.isoformat()
+            if birth_date is not None
+            else extracted_texts["birth_date"].replace(".", "-")
+        ),
+        "field_errors": validate_identity_fields(
+            extracted_texts["id_number"], extracted_texts["birth_date"]
+        ),
+    }
+    return result
 
 
-def get_latest_path(file_type: str = "image", save_dir: str = "app/upload_file") -> str:
+def hash_upload(file: UploadFile, max_bytes=MAX_UPLOAD_BYTES):
     """
-    Get the full path of the latest uploaded file based on type.
+    Hash an upload in place and rewind it, without copying its content.
 
     Parameters
     ----------
-    file_type : str
-        Type of file to look for: "image" or "json". Default is "image".
-    save_dir : str
-        Directory where files are saved.
+    file : UploadFile
+        The uploaded image file from FastAPI.
+    max_bytes : int, optional
+        Maximum accepted upload size. Default is `MAX_UPLOAD_BYTES`.
 
     Returns
     -------
     str
-        Full path to the first matching file.
+        The SHA-256 hex digest of the upload.
+
+    Raises
+    ------
+    UploadTooLargeError
+        If the upload exceeds `max_bytes`.
+
+    Notes
+    -----
+    The upload is read chunk by chunk from the spooled file FastAPI received
+    it into, then rewound, so `file.file` can be passed as is to the decoder.
+    """
+    content_hash = hashlib.sha256()
+    for chunk in iter_upload_chunks(file, max_bytes):
+        content_hash.update(chunk)
+    file.file.seek(0)
+    return content_hash.hexdigest()
+
+
+def decode_image(data, filename=None):
+    """
+    Decode an uploaded image.
+
+    Parameters
+    ----------
+    data : bytes, bytearray or file object
+        The encoded image, or a binary file positioned at its start.
+    filename : str, optional
+        Name reported in the error message.
+
+    Returns
+    -------
+    np.ndarray
+        The decoded BGR image, upright and at most `preprocessing.MAX_IMAGE_SIDE`
+        pixels on its longest side.
+
+    Raises
+    ------
+    ValueError
+        If the data cannot be decoded as an image.
+
+    Notes
+    -----
+    JPEG uploads are decoded at a reduced resolution when they are larger than
+    needed, see `preprocessing.load_image`.
+    """
+    try:
+        return load_image(data)
+    except ValueError:
+        raise ValueError(f"{filename or 'Upload'} is not a valid image") from None
+
+
+def cached_inference(content_hash, run_inference):
     """
-    ext_map = {"image": ".png", "json": ".json"}
+    Return the OCR results of an image from the result cache, running inference on a miss.
 
-    if file_type not in ext_map:
-        raise ValueError("file_type must be either 'image' or 'json'")
+    Parameters
+    ----------
+    content_hash : str
+        SHA-256 hex digest of the image bytes.
+    run_inference : callable
+        Called without arguments on a cache miss, returns the OCR results.
+
+    Returns
+    -------
+    dict
+        OCR results keyed by field label.
+
+    Notes
+    -----
+    The cache key includes the fingerprint of the served weights, so a hot
+    swap of the detector never returns results of the previous model.
+    """
+    key = result_cache.make_key(content_hash, registry.weights_version)
+    extracted_texts = result_cache.get(key)
+    if extracted_texts is None:
+        try:
+            extracted_texts = run_inference()
+        except Exception:
+            inference_failures.inc()
+            raise
+        result_cache.set(key, extracted_texts)
+    return extracted_texts
+
+
+async def async_cached_inference(content_hash, run_inference):
+    """
+    Return the OCR results of an image from the result cache, awaiting inference on a miss.
+
+    Parameters
+    ----------
+    content_hash : str
+        SHA-256 hex digest of the image bytes.
+    run_inference : callable
+        Called without arguments on a cache miss, returns an awaitable of the OCR results.
+
+    Returns
+    -------
+    dict
+        OCR results keyed by field label.
+
+    Notes
+    -----
+    Same cache as `cached_inference`. The lookups may read the SQLite tier of
+    the cache, so they run in the thread pool.
+    """
+    key = await run_in_threadpool(
+        lambda: result_cache.make_key(content_hash, registry.weights_version)
+    )
+    extracted_texts = await run_in_threadpool(result_cache.get, key)
+    if extracted_texts is None:
+        try:
+            extracted_texts = await run_inference()
+        except PoolFullError:
+            raise
+        except Exception:
+            inference_failures.inc()
+            raise
+        await run_in_threadpool(result_cache.set, key, extracted_texts)
+    return extracted_texts
+
+
+def show_inference_results_batch(files):
+    """
+    Run inference on several uploaded identity card images at once.
+
+    Parameters
+    ----------
+    files : list of UploadFile
+        The uploaded identity card images.
+
+    Returns
+    -------
+    list of dict
+        One result per image, in upload order. Each result holds the uploaded
+        'filename' and the identity fields from `format_inference_result`.
+
+    Notes
+    -----
+    Uploads are hashed and decoded straight from the spooled files FastAPI
+    received them into, without another copy. Images already in the result
+    cache are not decoded. The endpoint accepts at most `BATCH_MAX_FILES`
+    files, as the decoded images are all kept in memory until the batch is done.
+    """
+    keys = [
+        result_cache.make_key(hash_upload(file), registry.weights_version)
+        for file in files
+    ]
+    batch_texts = [result_cache.get(key) for key in keys]
 
-    file_extension = ext_map[file_type]
-    file = [f for f in os.listdir(save_dir) if f.endswith(file_extension)]
+    # Only the images missing from the cache are decoded and sent to the models
+    misses = [index for index, texts in enumerate(batch_texts) if texts is None]
+    if misses:
+        images = [
+            decode_image(files[index].file, files[index].filename) for index in misses
+        ]
+        try:
+            miss_texts = extract_inference_batch(images, batch_size=BATCH_MAX_SIZE)
+        except Exception:
+            inference_failures.inc()
+            raise
+        for index, extracted_texts in zip(misses, miss_texts):
+            result_cache.set(keys[index], extracted_texts)
+            batch_texts[index] = extracted_texts
 
-    if not file:
-        raise FileNotFoundError(f"No {file_extension} files found in {save_dir}")
+    return [
+        {"filename": file.filename, **format_inference_result(extracted_texts)}
+        for file, extracted_texts in zip(files, batch_texts)
+    ]
 
-    return os.path.join(save_dir, file[0]).replace("\\", "/")
 
+def prefix_upper_bound(prefix):
+    """
+    Return the smallest string greater than every string starting with `prefix`.
+
+    `surname >= prefix AND surname < prefix_upper_bound(prefix)` is a range on
+    the surname index, whereas `LIKE 'prefix%'` is a full scan in SQLite.
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def identity_cards_query(
+    limit=LIST_PAGE_SIZE,
+    cursor=None,
+    created_from=None,
+    created_to=None,
+    surname_prefix=None,
+    birth_date=None,
+):
+    """
+    Build the statement selecting one page of saved identity cards.
+
+    Cards are returned newest first, in descending id order.
+
+    Parameters
+    ----------
+    limit : int, optional
+        Page size. One extra row is selected to tell whether a next page exists.
+    cursor : int, optional
+        The `next_cursor` of the previous page, i.e. the id of its last card.
+    created_from : date, optional
+        Only cards saved on or after this date.
+    created_to : date, optional
+        Only cards saved on or before this date.
+    surname_prefix : str, optional
+        Only cards whose surname starts with this prefix (case-sensitive).
+    birth_date : date, optional
+        Only cards with this birth date.
+
+    Returns
+    -------
+    sqlalchemy.sql.Select
+        The select statement.
+
+    Notes
+    -----
+    Pages are delimited by the last id seen (keyset pagination) instead of an
+    OFFSET, so reading page N costs the same as reading the first page.
+    """
+    query = select(IdentityCard)
+    if cursor is not None:
+        query = query.where(IdentityCard.id < cursor)
+    query = filter_identity_cards(
+        query, created_from, created_to, surname_prefix, birth_date
+    )
+    return query.order_by(IdentityCard.id.desc()).limit(limit + 1)
 
-def save_inference_result_to_json(result, json_file_path):
+
+def filter_identity_cards(
+    query, created_from=None, created_to=None, surname_prefix=None, birth_date=None
+):
+    """
+    Add the listing filters to a select statement on the identity card table.
+
+    See `identity_cards_query` for the parameters.
+    """
+    if created_from is not None:
+        query = query.where(IdentityCard.created_at >= created_from)
+    if created_to is not None:
+        query = query.where(IdentityCard.created_at <= created_to)
+    if surname_prefix:
+        query = query.where(
+            IdentityCard.surname >= surname_prefix,
+            IdentityCard.surname < prefix_upper_bound(surname_prefix),
+        )
+    if birth_date is not None:
+        query = query.where(IdentityCard.birth_date == birth_date)
+    return query
+
+
+def make_identity_card_page(cards, limit):
     """
-    Save the inference result to a JSON file.
+    Split the rows of `identity_cards_query` into a page and its next cursor.
 
     Parameters
     ----------
-    result : dict
-        The dictionary containing extracted text.
+    cards : list of IdentityCard
+        The selected rows, at most `limit + 1`.
+    limit : int
+        The page size passed to `identity_cards_query`.
 
+    Returns
+    -------
+    dict
+        A dictionary with the page 'items' and the 'next_cursor', None on the last page.
     """
-    # json_file_path = os.path.join(save_dir, "inference_result.json").replace("\\", "/")
-    with open(json_file_path, "w+") as f:
-        json.dump(result, f)
+    items = list(cards[:limit])
+    next_cursor = items[-1].id if len(cards) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
 
 
-def load_json_file(json_file_path):
+async def async_list_identity_cards(db: AsyncSession, limit=LIST_PAGE_SIZE, **filters):
     """
-    Load json file to save data into database.
+    Return one page of saved identity cards, without blocking the event loop.
 
     Parameters
     ----------
-    json_file_path : str
-        The file path where json file was saved.
+    db : AsyncSession
+        The database session.
+    limit : int, optional
+        Page size. Default is `LIST_PAGE_SIZE`.
+    **filters
+        Cursor and filters accepted by `identity_cards_query`.
 
     Returns
     -------
     dict
-        The dictionary containing inference result data.
+        The page, as returned by `make_identity_card_page`.
     """
-    with open(json_file_path, "r") as file:
-        data = json.load(file)
-    return data
+    cards = (await db.scalars(identity_cards_query(limit, **filters))).all()
+    return make_identity_card_page(cards, limit)
 
 
-def save_identity_card_from_json():
+async def async_save_identity_card(db: AsyncSession, identity_card):
     """
-    Save inference results from a JSON file to an IdentityCard object.
+    Insert one identity card, without blocking the event loop.
 
-    Loads data from the most recent `inference_result.json` file and converts it
-    into an `IdentityCard` ORM object (not yet committed to the database).
+    Parameters
+    ----------
+    db : AsyncSession
+        The database session.
+    identity_card : IdentityCard
+        The card to insert, e.g. from `save_identity_card_from_job`.
 
     Returns
     -------
     IdentityCard
-        A SQLAlchemy IdentityCard object containing the parsed inference result data.
+        The saved card. Its id is set by the insert, so it is not re-selected.
+
+    Raises
+    ------
+    sqlalchemy.exc.IntegrityError
+        If the identity number is already saved. The session is rolled back.
     """
-    json_path = get_latest_path(file_type="json")
-    data = load_json_file(json_path)
+    db.add(identity_card)
+    try:
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return identity_card
 
-    date_format = "%Y-%m-%d"
-    identity_card = IdentityCard(
-        identity_number=data["identity_number"],
-        surname=data["surname"],
-        name=data["name"],
-        birth_date=datetime.strptime(data["birth_date"], date_format),
-        created_at=date.today(),
-    )
+
+async def async_save_inference_result(db: AsyncSession, job_id):
+    """
+    Save the inference result of a job as an identity card.
+
+    Parameters
+    ----------
+    db : AsyncSession
+        The database session.
+    job_id : str
+        The job id returned by the upload step.
+
+    Returns
+    -------
+    IdentityCard
+        The saved card.
+
+    Raises
+    ------
+    JobNotFoundError
+        If the job id is unknown.
+    ValueError
+        If the job has no usable inference result, see `save_identity_card_from_job`.
+    DuplicateIdentityCardError
+        If the identity number is already saved.
+    """
+    identity_card = save_identity_card_from_job(job_id)
+    try:
+        with stage_seconds.time(stage="db_save"):
+            await async_save_identity_card(db, identity_card)
+    except IntegrityError:
+        raise DuplicateIdentityCardError(identity_card.identity_number) from None
     return identity_card
 
 
-def show_inference_result():
+def bulk_insert_statement(dialect_name, rows, on_conflict):
+    """
+    Build the multi-row insert of one bulk save batch.
+
+    Parameters
+    ----------
+    dialect_name : str
+        Name of the database dialect, e.g. "sqlite".
+    rows : list of dict
+        Column values of the cards to insert.
+    on_conflict : str
+        "update" overwrites the saved card with the same identity number,
+        "skip" and "report" leave it untouched.
+
+    Returns
+    -------
+    sqlalchemy.sql.Insert
+        The statement, returning the id and identity number of every written row.
+        None if the dialect has no ON CONFLICT clause.
+    """
+    dialect_insert = UPSERT_DIALECTS.get(dialect_name)
+    if dialect_insert is None:
+        return None
+
+    statement = dialect_insert(IdentityCard).values(rows)
+    if on_conflict == "update":
+        statement = statement.on_conflict_do_update(
+            index_elements=[IdentityCard.identity_number],
+            set_={
+                column: statement.excluded[column]
+                for column in ("surname", "name", "birth_date", "created_at")
+            },
+        )
+    else:
+        statement = statement.on_conflict_do_nothing(
+            index_elements=[IdentityCard.identity_number]
+        )
+    return statement.returning(IdentityCard.id, IdentityCard.identity_number)
+
+
+def write_bulk_batch(db: Session, rows, existing, on_conflict):
     """
-    Run inference on the latest uploaded image and extract identity information.
+    Write one batch of cards and return the ids of the written rows.
+
+    Parameters
+    ----------
+    db : Session
+        The database session. The batch is not committed.
+    rows : list of dict
+        Column values of the cards to write, with unique identity numbers.
+    existing : dict
+        Ids of the already saved cards among `rows`, keyed by identity number.
+    on_conflict : str
+        The conflict policy, see `bulk_insert_statement`.
 
     Returns
     -------
     dict
-        Dictionary containing extracted identity fields:
-        'identity_number', 'surname', 'name', and 'birth_date'.
+        Ids of the inserted or updated rows, keyed by identity number.
     """
-    image_path = get_latest_path(file_type="image")
+    statement = bulk_insert_statement(db.get_bind().dialect.name, rows, on_conflict)
+    if statement is not None:
+        return {number: id_ for id_, number in db.execute(statement)}
 
-    crop_output_dir = "identity-scan/crops"
-    extracted_texts = extract_inference(image_path, crop_output_dir)
+    # Without ON CONFLICT, rely on the existing rows read before the write.
+    new_rows = [row for row in rows if row["identity_number"] not in existing]
+    written = {}
+    if new_rows:
+        inserted = db.execute(
+            insert(IdentityCard).returning(IdentityCard.id, IdentityCard.identity_number),
+            new_rows,
+        )
+        written.update((number, id_) for id_, number in inserted)
+    if on_conflict == "update":
+        for row in rows:
+            if row["identity_number"] in existing:
+                db.execute(
+                    update(IdentityCard)
+                    .where(IdentityCard.identity_number == row["identity_number"])
+                    .values(row)
+                )
+                written[row["identity_number"]] = existing[row["identity_number"]]
+    return written
 
-    result = {
-        "identity_number": extracted_texts["id_number"],
-        "surname": extracted_texts["surname"],
-        "name": extracted_texts["name"],
-        "birth_date": extracted_texts["birth_date"].replace(".", "-"),
+
+def bulk_save_identity_cards(
+    db: Session, cards, on_conflict="skip", batch_size=BULK_SAVE_BATCH_SIZE
+):
+    """
+    Save many identity cards in batched transactions.
+
+    Parameters
+    ----------
+    db : Session
+        The database session.
+    cards : list of IdentityCardRequest
+        The cards to save.
+    on_conflict : str, optional
+        Policy for cards whose identity number is already saved: "skip" leaves
+        the saved card and reports the row as skipped, "update" overwrites the
+        saved card, "report" leaves it and reports the row as a conflict.
+        Default is "skip".
+    batch_size : int, optional
+        Cards written per transaction. Default is `BULK_SAVE_BATCH_SIZE`.
+
+    Returns
+    -------
+    dict
+        Counts per outcome and the per-row 'results', in request order, as
+        described by `BulkSaveResponse`.
+
+    Notes
+    -----
+    - Each batch is one multi-row INSERT ... ON CONFLICT statement and one
+      commit, instead of a transaction and a re-select per card.
+    - A batch that fails is rolled back and the error propagates. Batches
+      committed before it stay saved.
+    - Repeated identity numbers within the request are reported as
+      "duplicate" after their first occurrence and are not written.
+    - Cards failing `identity_field_errors` carry their 'field_errors'. With
+      `REJECT_INVALID_FIELDS` they are reported as "invalid" and not written,
+      like the single save refuses them.
+    """
+    created_at = date.today()
+    results = []
+    seen = set()
+    batch = []
+    for index, card in enumerate(cards):
+        outcome = {"index": index, "identity_number": card.identity_number, "id": None}
+        results.append(outcome)
+        errors = identity_field_errors(card.identity_number, card.birth_date.isoformat())
+        if errors:
+            outcome["field_errors"] = errors
+            if REJECT_INVALID_FIELDS:
+                outcome["status"] = "invalid"
+                continue
+        if card.identity_number in seen:
+            outcome["status"] = "duplicate"
+            continue
+        seen.add(card.identity_number)
+        batch.append((outcome, {**card.model_dump(), "created_at": created_at}))
+
+    status_counts = {
+        "inserted": 0,
+        "updated": 0,
+        "skipped": 0,
+        "conflict": 0,
+        "duplicate": 0,
+        "invalid": 0,
     }
-    return result
+    for start in range(0, len(batch), batch_size):
+        outcomes, rows = zip(*batch[start : start + batch_size])
+        numbers = [row["identity_number"] for row in rows]
+        try:
+            with stage_seconds.time(stage="db_bulk_save"):
+                existing = dict(
+                    db.execute(
+                        select(IdentityCard.identity_number, IdentityCard.id).where(
+                            IdentityCard.identity_number.in_(numbers)
+                        )
+                    ).all()
+                )
+                written = write_bulk_batch(db, list(rows), existing, on_conflict)
+                db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        for outcome in outcomes:
+            number = outcome["identity_number"]
+            if number in written:
+                outcome["id"] = written[number]
+                outcome["status"] = "updated" if number in existing else "inserted"
+            else:
+                # Saved before this request, or by a concurrent one meanwhile
+                outcome["id"] = existing.get(number)
+                outcome["status"] = "conflict" if on_conflict == "report" else "skipped"
+
+    for outcome in results:
+        status_counts[outcome["status"]] += 1
+    return {
+        "inserted": status_counts["inserted"],
+        "updated": status_counts["updated"],
+        "skipped": status_counts["skipped"],
+        "conflicts": status_counts["conflict"],
+        "duplicates": status_counts["duplicate"],
+        "invalid": status_counts["invalid"],
+        "results": results,
+    }
+
 
+async def async_bulk_save_identity_cards(
+    db: AsyncSession, cards, on_conflict="skip", batch_size=BULK_SAVE_BATCH_SIZE
+):
+    """
+    Save many identity cards in batched transactions, without blocking the event loop.
+
+    Runs `bulk_save_identity_cards` on the connection of the async session,
+    see it for the parameters and the returned outcomes.
+    """
+    return await db.run_sync(
+        bulk_save_identity_cards, cards, on_conflict, batch_size
+    )
+
+
+def format_export_chunk(rows, export_format):
+    """
+    Encode rows of `EXPORT_COLUMNS` values as NDJSON lines or CSV records.
+    """
+    if export_format == "ndjson":
+        return "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=str) + "\n" for row in rows
+        )
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
 
-def create_json_file(save_dir):
-    json_file_path = os.path.join(save_dir, "inference_result.json").replace("\\", "/")
-    return json_file_path
 
+def iter_identity_card_export(export_format="ndjson", **filters):
+    """
+    Stream the saved identity cards as NDJSON or CSV.
+
+    Parameters
+    ----------
+    export_format : str, optional
+        "ndjson" (one JSON object per line) or "csv" (with a header row).
+        Default is "ndjson".
+    **filters
+        Filters accepted by `filter_identity_cards`.
+
+    Yields
+    ------
+    str
+        Encoded chunks of at most `EXPORT_CHUNK_SIZE` cards, in id order.
+
+    Notes
+    -----
+    - Rows are read from the database cursor `EXPORT_CHUNK_SIZE` at a time
+      (`yield_per`) as plain tuples, without ORM objects, so memory use does
+      not depend on the table size.
+    - The generator opens its own session, as it keeps running after the
+      endpoint has returned.
+    """
+    columns = [getattr(IdentityCard, column) for column in EXPORT_COLUMNS]
+    query = filter_identity_cards(select(*columns), **filters).order_by(IdentityCard.id)
 
-def delete_content_in_json(json_file_path):
-    with open(json_file_path, "r+") as f:
-        f.seek(0)
-        f.truncate()
+    if export_format == "csv":
+        yield format_export_chunk([EXPORT_COLUMNS], export_format)
+    with SessionLocal() as db:
+        result = db.execute(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+        for rows in result.partitions():
+            yield format_export_chunk(rows, export_format)
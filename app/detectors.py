@@ -0,0 +1,407 @@
+import ast
+import glob
+import os
+
+import cv2
+import numpy as np
+import yaml
+from ultralytics import YOLO
+
+# "torch" runs the ultralytics checkpoint, "onnx" and "openvino" run an export of it.
+DETECTOR_BACKEND = os.getenv("DETECTOR_BACKEND", "torch")
+# Intra-op threads of the ONNX Runtime / OpenVINO session, 0 lets the runtime decide.
+DETECTOR_THREADS = int(os.getenv("DETECTOR_THREADS", "0"))
+# INT8 quantization of the exported detector: "none", "dynamic" (onnx only) or
+# "static" (calibrated on the synthetic training images, onnx and openvino).
+DETECTOR_QUANTIZATION = os.getenv("DETECTOR_QUANTIZATION", "none")
+DETECTOR_IMAGE_SIZE = int(os.getenv("DETECTOR_IMAGE_SIZE", "640"))
+# Same defaults as ultralytics predict, so every backend returns the same boxes.
+DETECTOR_CONFIDENCE = float(os.getenv("DETECTOR_CONFIDENCE", "0.25"))
+DETECTOR_IOU = float(os.getenv("DETECTOR_IOU", "0.7"))
+MAX_DETECTIONS = 300
+# Suffix ultralytics gives the export of `<name>.pt`, by backend.
+EXPORT_SUFFIXES = {"onnx": ".onnx", "openvino": "_openvino_model"}
+QUANTIZATION_MODES = {
+    "torch": ("none",),
+    "onnx": ("none", "dynamic", "static"),
+    "openvino": ("none", "static"),
+}
+# Offset separating the boxes of different classes in a single NMS call.
+CLASS_OFFSET = 7680
+
+
+class DetectorResult:
+    """
+    Detections of one image by an exported detector.
+
+    Plays the part of an ultralytics `Results` for the pipeline in `inference.py`.
+
+    Parameters
+    ----------
+    orig_img : np.ndarray
+        The decoded BGR image.
+    detections : dict
+        Detection arrays, in the format returned by `inference.get_detections`.
+    names : dict
+        Mapping from class id to field label.
+    """
+
+    def __init__(self, orig_img, detections, names):
+        self.orig_img = orig_img
+        self.detections = detections
+        self.names = names
+
+
+def exported_path(weights_path, backend, int8=False):
+    """
+    Return where ultralytics writes the `backend` export of a `.pt` checkpoint.
+    """
+    stem = os.path.splitext(weights_path)[0]
+    return stem + ("_int8" if int8 else "") + EXPORT_SUFFIXES[backend]
+
+
+def is_stale(path, source_path):
+    """
+    Return True if `path` is missing or older than the file it was derived from.
+    """
+    return not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(source_path)
+
+
+def export_detector(weights_path, backend="onnx", imgsz=DETECTOR_IMAGE_SIZE, **kwargs):
+    """
+    Export trained YOLO weights for a CPU runtime.
+
+    Parameters
+    ----------
+    weights_path : str
+        Path to the `.pt` checkpoint, e.g. `runs/detect/train/weights/best.pt`.
+    backend : str, optional
+        "onnx" or "openvino". Default is "onnx".
+    imgsz : int, optional
+        Input size of the exported model. Default is `DETECTOR_IMAGE_SIZE`.
+    **kwargs
+        Extra arguments of `YOLO.export`, e.g. `int8=True`.
+
+    Returns
+    -------
+    str
+        Path of the exported model, next to the checkpoint.
+
+    Notes
+    -----
+    - The batch dimension is dynamic so `extract_inference_batch` can still send
+      several images in one call.
+    - `int8=True, data="dataset.yaml"` makes an OpenVINO export quantized with
+      NNCF, calibrated on the dataset images.
+    """
+    return YOLO(weights_path).export(format=backend, imgsz=imgsz, dynamic=True, **kwargs)
+
+
+def letterbox(image, imgsz):
+    """
+    Resize an image to fit a square input, keeping its aspect ratio, and pad it.
+
+    Parameters
+    ----------
+    image : np.ndarray
+        The BGR image.
+    imgsz : int
+        Side of the square model input.
+
+    Returns
+    -------
+    tuple
+        A tuple containing the padded image, the resize gain and the (left, top)
+        padding, as done by ultralytics `LetterBox`.
+    """
+    height, width = image.shape[:2]
+    gain = min(imgsz / height, imgsz / width)
+    new_width, new_height = round(width * gain), round(height * gain)
+    pad_x, pad_y = (imgsz - new_width) / 2, (imgsz - new_height) / 2
+    if (new_width, new_height) != (width, height):
+        image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    top, bottom = round(pad_y - 0.1), round(pad_y + 0.1)
+    left, right = round(pad_x - 0.1), round(pad_x + 0.1)
+    image = cv2.copyMakeBorder(
+        image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114)
+    )
+    return image, gain, (left, top)
+
+
+def make_batch(images, imgsz):
+    """
+    Letterbox BGR images into one normalized model input.
+
+    Parameters
+    ----------
+    images : list of np.ndarray
+        The decoded BGR images.
+    imgsz : int
+        Side of the square model input.
+
+    Returns
+    -------
+    tuple
+        A tuple containing the (N, 3, imgsz, imgsz) float32 RGB batch in [0, 1]
+        and the (gain, pad) of each image, to map the boxes back with `postprocess`.
+    """
+    letterboxed = [letterbox(image, imgsz) for image in images]
+    # BGR HWC uint8 -> RGB CHW, stacked into one batch
+    batch = np.stack([padded[..., ::-1].transpose(2, 0, 1) for padded, _, _ in letterboxed])
+    batch = np.ascontiguousarray(batch, dtype=np.float32) / 255
+    return batch, [(gain, pad) for _, gain, pad in letterboxed]
+
+
+def postprocess(prediction, gain, pad, shape, conf=DETECTOR_CONFIDENCE, iou=DETECTOR_IOU):
+    """
+    Turn the raw YOLO output of one image into detection arrays.
+
+    Parameters
+    ----------
+    prediction : np.ndarray
+        (4 + num_classes, num_anchors) output: box centers and sizes, then class scores.
+    gain : float
+        Resize gain returned by `letterbox`.
+    pad : tuple of int
+        (left, top) padding returned by `letterbox`.
+    shape : tuple of int
+        (height, width) of the original image.
+    conf : float, optional
+        Minimum class score. Default is `DETECTOR_CONFIDENCE`.
+    iou : float, optional
+        IoU threshold of the per-class non-maximum suppression. Default is `DETECTOR_IOU`.
+
+    Returns
+    -------
+    dict
+        'boxes' (N, 4) in original image pixels, 'classes' (N,) and 'scores' (N,),
+        sorted by decreasing score.
+    """
+    prediction = prediction.T
+    class_scores = prediction[:, 4:]
+    classes = class_scores.argmax(axis=1)
+    scores = class_scores[np.arange(len(classes)), classes]
+    keep = scores > conf
+    xywh, classes, scores = prediction[keep, :4], classes[keep], scores[keep]
+
+    # cv2.dnn.NMSBoxes takes (x, y, w, h) boxes. Shifting each class by its own
+    # offset keeps boxes of different classes from suppressing each other.
+    nms_boxes = xywh.copy()
+    nms_boxes[:, :2] -= nms_boxes[:, 2:] / 2
+    nms_boxes[:, :2] += (classes * CLASS_OFFSET)[:, None]
+    indices = cv2.dnn.NMSBoxes(nms_boxes.tolist(), scores.tolist(), conf, iou)
+    indices = np.asarray(indices, dtype=int).reshape(-1)[:MAX_DETECTIONS]
+
+    xywh = xywh[indices]
+    boxes = np.concatenate([xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2], axis=1)
+    boxes -= np.array([pad[0], pad[1], pad[0], pad[1]], dtype=boxes.dtype)
+    boxes /= gain
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, shape[1])
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, shape[0])
+    return {
+        "boxes": boxes.astype(np.float32),
+        "classes": classes[indices].astype(int),
+        "scores": scores[indices].astype(np.float32),
+    }
+
+
+class ExportedDetector:
+    """
+    Base class of the detectors running an exported YOLO model.
+
+    Called like an ultralytics `YOLO` model: with an image path, a decoded BGR
+    image, or a list of either, it returns one `DetectorResult` per image.
+    Subclasses implement `_infer`.
+
+    Parameters
+    ----------
+    names : dict
+        Mapping from class id to field label.
+    imgsz : int, optional
+        Side of the square model input. Default is `DETECTOR_IMAGE_SIZE`.
+    """
+
+    def __init__(self, names, imgsz=DETECTOR_IMAGE_SIZE):
+        self.names = names
+        self.imgsz = imgsz
+
+    def __call__(self, source):
+        sources = source if isinstance(source, list) else [source]
+        images = []
+        for item in sources:
+            image = cv2.imread(item) if isinstance(item, str) else item
+            if image is None:
+                raise FileNotFoundError(f"Image not found: {item}")
+            images.append(image)
+
+        batch, transforms = make_batch(images, self.imgsz)
+        predictions = self._infer(batch)
+        return [
+            DetectorResult(
+                image, postprocess(prediction, gain, pad, image.shape[:2]), self.names
+            )
+            for image, prediction, (gain, pad) in zip(images, predictions, transforms)
+        ]
+
+    def _infer(self, batch):
+        raise NotImplementedError
+
+
+class OnnxDetector(ExportedDetector):
+    """
+    Runs an ONNX export of the detector with ONNX Runtime on CPU.
+
+    Parameters
+    ----------
+    model_path : str
+        Path to the `.onnx` file written by `export_detector`.
+    threads : int, optional
+        Intra-op threads, 0 lets ONNX Runtime use every core. Default is `DETECTOR_THREADS`.
+    imgsz : int, optional
+        Side of the square model input. Default is `DETECTOR_IMAGE_SIZE`.
+    """
+
+    def __init__(self, model_path, threads=DETECTOR_THREADS, imgsz=DETECTOR_IMAGE_SIZE):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            model_path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        # ultralytics stores the class names in the ONNX metadata
+        names = ast.literal_eval(self.session.get_modelmeta().custom_metadata_map["names"])
+        super().__init__(names, imgsz)
+
+    def _infer(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class OpenVinoDetector(ExportedDetector):
+    """
+    Runs an OpenVINO export of the detector on CPU.
+
+    Parameters
+    ----------
+    model_dir : str
+        The `<name>_openvino_model` directory written by `export_detector`.
+    threads : int, optional
+        Inference threads, 0 lets OpenVINO decide. Default is `DETECTOR_THREADS`.
+    imgsz : int, optional
+        Side of the square model input. Default is `DETECTOR_IMAGE_SIZE`.
+    """
+
+    def __init__(self, model_dir, threads=DETECTOR_THREADS, imgsz=DETECTOR_IMAGE_SIZE):
+        import openvino as ov
+
+        config = {"PERFORMANCE_HINT": "LATENCY"}
+        if threads:
+            config["INFERENCE_NUM_THREADS"] = threads
+        model_xml = glob.glob(os.path.join(model_dir, "*.xml"))[0]
+        self.model = ov.Core().compile_model(model_xml, "CPU", config)
+        with open(os.path.join(model_dir, "metadata.yaml")) as f:
+            names = yaml.safe_load(f)["names"]
+        super().__init__(names, imgsz)
+
+    def _infer(self, batch):
+        return self.model(batch)[self.model.output(0)]
+
+
+def resolve_detector_path(weights_path, backend=DETECTOR_BACKEND, quantization=DETECTOR_QUANTIZATION):
+    """
+    Return the model file served for a backend, exporting and quantizing it if needed.
+
+    Parameters
+    ----------
+    weights_path : str
+        Path to the `.pt` checkpoint, or to an existing export for the
+        "onnx" and "openvino" backends.
+    backend : str, optional
+        "torch", "onnx" or "openvino". Default is `DETECTOR_BACKEND`.
+    quantization : str, optional
+        "none", "dynamic" or "static", see `QUANTIZATION_MODES` for the modes
+        of each backend. Default is `DETECTOR_QUANTIZATION`.
+
+    Returns
+    -------
+    str
+        Path of the model to load, also accepted by ultralytics `YOLO`.
+
+    Raises
+    ------
+    ValueError
+        If the backend is unknown or does not support the quantization mode.
+
+    Notes
+    -----
+    A `.pt` checkpoint is exported and quantized on first use, and again
+    whenever it is newer than its export, e.g. after retraining `best.pt` in place.
+    """
+    if quantization not in QUANTIZATION_MODES.get(backend, ()):
+        raise ValueError(f"Unsupported detector backend and quantization: {backend}, {quantization}")
+    if backend == "torch" or not weights_path.endswith(".pt"):
+        return weights_path
+
+    if backend == "openvino":
+        int8 = quantization == "static"
+        model_path = exported_path(weights_path, backend, int8=int8)
+        if is_stale(model_path, weights_path):
+            kwargs = {"int8": True, "data": "dataset.yaml"} if int8 else {}
+            model_path = export_detector(weights_path, backend, **kwargs)
+        return model_path
+
+    model_path = exported_path(weights_path, backend)
+    if is_stale(model_path, weights_path):
+        model_path = export_detector(weights_path, backend)
+    if quantization != "none":
+        from .quantization import quantize_detector, quantized_path
+
+        source_path = model_path
+        model_path = quantized_path(source_path, quantization)
+        if is_stale(model_path, source_path):
+            quantize_detector(source_path, quantization, model_path)
+    return model_path
+
+
+def load_detector(
+    weights_path,
+    backend=DETECTOR_BACKEND,
+    threads=DETECTOR_THREADS,
+    quantization=DETECTOR_QUANTIZATION,
+):
+    """
+    Load the field detector with the requested backend.
+
+    Parameters
+    ----------
+    weights_path : str
+        Path to the `.pt` checkpoint, or to an existing export for the
+        "onnx" and "openvino" backends.
+    backend : str, optional
+        "torch", "onnx" or "openvino". Default is `DETECTOR_BACKEND`.
+    threads : int, optional
+        Intra-op threads of the exported backends. Default is `DETECTOR_THREADS`.
+    quantization : str, optional
+        INT8 quantization of the exported backends, see `resolve_detector_path`.
+        Default is `DETECTOR_QUANTIZATION`.
+
+    Returns
+    -------
+    YOLO or ExportedDetector
+        A model called with images that returns one result per image.
+
+    Raises
+    ------
+    ValueError
+        If the backend is unknown or does not support the quantization mode.
+    """
+    model_path = resolve_detector_path(weights_path, backend, quantization)
+    if backend == "torch":
+        return YOLO(model_path)
+    if backend == "onnx":
+        return OnnxDetector(model_path, threads)
+    return OpenVinoDetector(model_path, threads)
@@ -1,14 +1,10 @@
 import gradio as gr
-import httpx
 import os
-import mimetypes  
-
-# Define the FastAPI base URL
-FASTAPI_BASE_URL = "http://127.0.0.1:8000"
-
-# Asynchronous client for making HTTP requests
-client = httpx.AsyncClient()
+import mimetypes
+from .ui_backends import BackendError, FASTAPI_BASE_URL, create_backend
 
+# How the UI handlers reach the API, set by `create_gradio_ui`
+backend = None
 
 
 async def gradio_upload_image(image_file_obj):
@@ -16,9 +12,9 @@ async def gradio_upload_image(image_file_obj):
     Handles the image upload from Gradio to the FastAPI backend.
 
     This asynchronous function takes an image file object (typically a file path
-    provided by Gradio's gr.File component), uploads it to the FastAPI endpoint
-    `/identity_cards/save_file/`, and returns the path where the image was saved
-    on the server, along with a status message.
+    provided by Gradio's gr.File component), uploads it through the FastAPI endpoint
+    `/identity_cards/save_file/` (or its function, when mounted), and returns the path where the image was saved
+    on the server, a status message, and the job id assigned to the upload.
 
     Parameters
     ----------
@@ -34,11 +30,13 @@ async def gradio_upload_image(image_file_obj):
           upload was successful, otherwise None.
         - str: A status message indicating the success or failure of the upload,
           including any error details.
+        - str or None: The job id to pass to the inference and save steps if
+          upload was successful, otherwise None.
 
     Raises
     ------
-    httpx.HTTPStatusError
-        If the FastAPI backend returns an HTTP error status (4xx or 5xx).
+    BackendError
+        If the FastAPI backend rejects the upload (4xx or 5xx).
     FileNotFoundError
         If the temporary file provided by Gradio cannot be found.
     Exception
@@ -46,14 +44,14 @@ async def gradio_upload_image(image_file_obj):
 
     Notes
     -----
-    This function internally uses `httpx.AsyncClient` to perform an
-    asynchronous POST request to the FastAPI backend. It infers the filename
-    and content type from the provided file path. Existing PNG files in the
-    upload directory on the server are deleted before a new file is saved by
-    the FastAPI backend.
+    This function goes through the module-level `backend`, which either calls
+    the API functions in-process or sends an asynchronous POST request with a
+    shared, pooled HTTP client. It infers the filename and content type from
+    the provided file path. Each upload gets its own job on the server, so
+    concurrent users do not overwrite each other's images.
     """
     if image_file_obj is None:
-        return None, "Please upload an image."
+        return None, "Please upload an image.", None
 
     file_path = image_file_obj
     filename = os.path.basename(file_path)
@@ -64,46 +62,42 @@ async def gradio_upload_image(image_file_obj):
         content_type = "application/octet-stream"
 
     try:
-        with open(file_path, "rb") as f:
-            files = {"file": (filename, f, content_type)}
-            # You can not give file_path directly without opening it, as httpx needs to read the actual binary content of the file.
-            response = await client.post(
-                f"{FASTAPI_BASE_URL}/identity_cards/save_file/", files=files
-            )
-            response.raise_for_status()
-
-            result = response.json()
-            saved_file_path = result.get("message")
+        result = await backend.upload(file_path, filename, content_type)
+        saved_file_path = result.get("message")
+        job_id = result.get("job_id")
 
-            return saved_file_path, f"Image uploaded to: {saved_file_path}"
+        return saved_file_path, f"Image uploaded to: {saved_file_path}", job_id
 
-    except httpx.HTTPStatusError as e:
+    except BackendError as e:
         return (
             None,
-            f"Error uploading image (HTTP Status {e.response.status_code}): {e.response.text}",
+            f"Error uploading image (HTTP Status {e.status_code}): {e.detail}",
+            None,
         )
     except FileNotFoundError:
         return (
             None,
             f"Error: The uploaded file was not found at {file_path}. It might have been temporary.",
+            None,
         )
     except Exception as e:
-        return None, f"An unexpected error occurred during upload: {e}"
+        return None, f"An unexpected error occurred during upload: {e}", None
 
 
-async def gradio_get_extracted_results():
+async def gradio_get_extracted_results(job_id):
     """
     Fetches and formats the latest OCR inference results from the FastAPI backend.
 
-    This asynchronous function makes an HTTP GET request to the FastAPI endpoint
-    `/identity_cards/show_inference_results/`. This endpoint is expected to
-    perform the OCR on the latest uploaded image and return the extracted data.
-    The function then formats the received data into a human-readable string
-    suitable for display in a Gradio Textbox.
+    This asynchronous function calls the FastAPI endpoint
+    `/identity_cards/show_inference_results/` through the `backend`. This endpoint is expected to
+    perform the OCR on the image uploaded for the given job and return the
+    extracted data. The function then formats the received data into a
+    human-readable string suitable for display in a Gradio Textbox.
 
     Parameters
     ----------
-    None
+    job_id : str or None
+        The job id returned by the upload step, kept in the session state.
 
     Returns
     -------
@@ -115,26 +109,24 @@ async def gradio_get_extracted_results():
 
     Raises
     ------
-    httpx.HTTPStatusError
-        If the FastAPI backend returns an HTTP error status (4xx or 5xx).
+    BackendError
+        If the FastAPI backend returns an error status (4xx or 5xx).
     Exception
         For any other unexpected errors during the data retrieval or parsing process.
 
     Notes
     -----
-    The FastAPI endpoint `/identity_cards/show_inference_results/` should
-    internally ensure that the OCR process is executed on the most recently
-    uploaded image file. This function relies on the FastAPI response
+    The FastAPI endpoint `/identity_cards/show_inference_results/` runs the
+    OCR process on the image of the given job and stores the result on that
+    job. This function relies on the FastAPI response
     containing specific keys like 'identity_number', 'surname', 'name',
     and 'birth_date'.
     """
-    try:
-        response = await client.get(
-            f"{FASTAPI_BASE_URL}/identity_cards/show_inference_results/"
-        )
-        response.raise_for_status()
+    if job_id is None:
+        return "Please upload an image first."
 
-        result = response.json()
+    try:
+        result = await backend.extract(job_id)
 
         formatted_result = (
             f"*ID Number*: {result.get('identity_number', 'N/A')}\n"
@@ -142,28 +134,32 @@ async def gradio_get_extracted_results():
             f"*Name*: {result.get('name', 'N/A')}\n"
             f"*Birth Date*: {result.get('birth_date', 'N/A')}\n"
         )
+        # Misread numeric fields, to be checked before saving
+        for field, error in result.get("field_errors", {}).items():
+            formatted_result += f"*Check {field}*: {error}\n"
 
         return formatted_result
 
-    except httpx.HTTPStatusError as e:
-        return f"Error getting inference results (HTTP Status {e.response.status_code}): {e.response.text}"
+    except BackendError as e:
+        return f"Error getting inference results (HTTP Status {e.status_code}): {e.detail}"
     except Exception as e:
         return f"An unexpected error occurred getting results: {e}"
 
 
-async def gradio_save_results_to_db():
+async def gradio_save_results_to_db(job_id):
     """
     Triggers the FastAPI backend to save the latest OCR inference results to the database.
 
-    This asynchronous function makes an HTTP POST request to the FastAPI endpoint
-    `/identity_cards/save_inference_results/`. This endpoint is responsible for
-    reading the most recently generated JSON inference result (on the server-side)
+    This asynchronous function calls the FastAPI endpoint
+    `/identity_cards/save_inference_results/` through the `backend`. This endpoint is responsible for
+    reading the inference result stored on the given job (on the server-side)
     and persisting that data into the application's database. The function then
     returns a status message indicating the success or failure of the save operation.
 
     Parameters
     ----------
-    None
+    job_id : str or None
+        The job id returned by the upload step, kept in the session state.
 
     Returns
     -------
@@ -174,25 +170,24 @@ async def gradio_save_results_to_db():
 
     Raises
     ------
-    httpx.HTTPStatusError
-        If the FastAPI backend returns an HTTP error status (4xx or 5xx).
+    BackendError
+        If the FastAPI backend returns an error status (4xx or 5xx), e.g. 409
+        when the identity number is already saved.
     Exception
         For any other unexpected errors during the database save process.
 
     Notes
     -----
     This function relies on the FastAPI backend having successfully performed OCR
-    and stored the results in a temporary JSON file via a previous call to
+    and stored the results on the job via a previous call to
     `/identity_cards/show_inference_results/`. The backend endpoint handles
     the database session management and data insertion.
     """
-    try:
-        response = await client.post(
-            f"{FASTAPI_BASE_URL}/identity_cards/save_inference_results/"
-        )
-        response.raise_for_status()
+    if job_id is None:
+        return "Please upload an image first."
 
-        result = response.json()
+    try:
+        result = await backend.save(job_id)
 
         return (
             f"Results saved to database successfully!\n"
@@ -202,59 +197,60 @@ async def gradio_save_results_to_db():
             f"Birth Date: {result.get('birth_date', 'N/A')}\n"
         )
 
-    except httpx.HTTPStatusError as e:
-        return f"Error saving results to database (HTTP Status {e.response.status_code}): {e.response.text}"
+    except BackendError as e:
+        return f"Error saving results to database (HTTP Status {e.status_code}): {e.detail}"
     except Exception as e:
         return f"An unexpected error occurred saving to DB: {e}"
 
 
-async def gradio_get_all_saved_results():
+async def gradio_get_all_saved_results(surname_prefix=None, cursor=None):
     """
-    Fetches and formats all identity card records stored in the database.
+    Fetches and formats one page of the identity card records stored in the database.
 
-    This asynchronous function makes an HTTP GET request to the FastAPI endpoint
-    `/identity_cards/get_inference_results`. This endpoint retrieves all saved
-    identity card entries from the database. The function then processes the
-    received list of records, formatting each entry into a user-friendly string
+    This asynchronous function calls the FastAPI endpoint
+    `/identity_cards/get_inference_results` through the `backend`. This endpoint retrieves one page of
+    saved identity card entries from the database, newest first. The function then
+    processes the received records, formatting each entry into a user-friendly string
     for display in a Gradio Textbox, separated by a visual delimiter.
 
     Parameters
     ----------
-    None
+    surname_prefix : str, optional
+        Only list cards whose surname starts with this prefix.
+    cursor : int, optional
+        The cursor returned with the previous page. None fetches the first page.
 
     Returns
     -------
-    str
-        A multi-line string where each line represents a saved identity card
-        record, detailing its ID, Identity Number, Name, Surname, Birth Date,
-        and Created At. Records are separated by '---' for readability.
-        Returns "No results saved yet." if the database contains no entries,
-        or an error message if the retrieval fails.
+    tuple
+        A tuple containing:
+        - str: A multi-line string where each line represents a saved identity card
+          record, detailing its ID, Identity Number, Name, Surname, Birth Date,
+          and Created At. Records are separated by '---' for readability.
+          Returns "No results saved yet." if the page contains no entries,
+          or an error message if the retrieval fails.
+        - int or None: The cursor of the next page, None on the last page.
 
     Raises
     ------
-    httpx.HTTPStatusError
-        If the FastAPI backend returns an HTTP error status (4xx or 5xx).
+    BackendError
+        If the FastAPI backend returns an error status (4xx or 5xx).
     Exception
         For any other unexpected errors during the data retrieval or formatting process.
 
     Notes
     -----
-    This function expects the FastAPI backend to return a list of dictionaries,
-    each conforming to the `IdentityCardResponse` schema, containing keys such
-    as 'id', 'identity_number', 'surname', 'name', 'birth_date', and
-    'created_at'.
+    This function expects the FastAPI backend to return an `IdentityCardPage`,
+    whose 'items' conform to the `IdentityCardResponse` schema, containing keys
+    such as 'id', 'identity_number', 'surname', 'name', 'birth_date', and
+    'created_at'. Only one page is held in memory, however large the table is.
     """
     try:
-        response = await client.get(
-            f"{FASTAPI_BASE_URL}/identity_cards/get_inference_results"
-        )
-        response.raise_for_status()
-
-        results = response.json()
+        page = await backend.list_cards(surname_prefix=surname_prefix or None, cursor=cursor)
+        results = page["items"]
 
         if not results:
-            return "No results saved yet."
+            return "No results saved yet.", None
 
         formatted_results = []
         for card in results:
@@ -267,15 +263,40 @@ async def gradio_get_all_saved_results():
             )
             formatted_results.append(card_str)
 
-        return "\n---\n".join(formatted_results)
+        return "\n---\n".join(formatted_results), page.get("next_cursor")
 
-    except httpx.HTTPStatusError as e:
-        return f"Error retrieving all results (HTTP Status {e.response.status_code}): {e.response.text}"
+    except BackendError as e:
+        return (
+            f"Error retrieving all results (HTTP Status {e.status_code}): {e.detail}",
+            None,
+        )
     except Exception as e:
-        return f"An unexpected error occurred retrieving all results: {e}"
+        return f"An unexpected error occurred retrieving all results: {e}", None
 
 
-def create_gradio_ui():
+async def gradio_get_next_saved_results(surname_prefix, cursor):
+    """
+    Fetches the page of saved identity cards following `cursor`.
+
+    Parameters
+    ----------
+    surname_prefix : str or None
+        The surname filter of the listing.
+    cursor : int or None
+        The cursor returned with the current page, kept in the session state.
+
+    Returns
+    -------
+    tuple
+        The formatted page and the cursor of the next one, as returned by
+        `gradio_get_all_saved_results`.
+    """
+    if cursor is None:
+        return "No more results.", None
+    return await gradio_get_all_saved_results(surname_prefix, cursor)
+
+
+def create_gradio_ui(mounted=False):
     """
     Constructs and returns the complete Gradio Blocks interface for the Identity Card OCR application.
 
@@ -288,7 +309,11 @@ def create_gradio_ui():
 
     Parameters
     ----------
-    None
+    mounted : bool, optional
+        True when the UI is mounted on the FastAPI app with `gr.mount_gradio_app`.
+        The handlers then call the API functions in-process (see
+        `ui_backends.create_backend`) instead of sending HTTP requests to
+        `FASTAPI_BASE_URL`. Default is False.
 
     Returns
     -------
@@ -301,7 +326,8 @@ def create_gradio_ui():
     gradio_upload_image : Handles image upload and display.
     gradio_get_extracted_results : Fetches and displays OCR results.
     gradio_save_results_to_db : Saves OCR results to the database.
-    gradio_get_all_saved_results : Retrieves and displays all saved records.
+    gradio_get_all_saved_results : Retrieves and displays the first page of saved records.
+    gradio_get_next_saved_results : Retrieves and displays the following page.
 
     Notes
     -----
@@ -311,8 +337,13 @@ def create_gradio_ui():
     `type="filepath"` for `gr.File` and `gr.Image` ensures that file paths
     are handled for display and processing.
     """
+    global backend
+    backend = create_backend(mounted)
+
     with gr.Blocks() as demo:
         gr.Markdown("# Turkish Identity Card Scan")
+        # Per-session job id returned by the upload and passed to later steps
+        job_id_state = gr.State(None)
 
         with gr.Row():
             with gr.Column():
@@ -330,7 +361,7 @@ def create_gradio_ui():
                 image_input.upload(
                     gradio_upload_image,
                     inputs=[image_input],
-                    outputs=[uploaded_image_display, upload_status],
+                    outputs=[uploaded_image_display, upload_status, job_id_state],
                 )
 
             with gr.Column():
@@ -340,27 +371,39 @@ def create_gradio_ui():
                 )
                 extract_button.click(
                     gradio_get_extracted_results,
-                    inputs=[],
+                    inputs=[job_id_state],
                     outputs=[extracted_results_output],
                 )
 
                 save_button = gr.Button("Save Results to Database")
                 save_status_output = gr.Textbox(label="Save Status", interactive=False)
                 save_button.click(
-                    gradio_save_results_to_db, inputs=[], outputs=[save_status_output]
+                    gradio_save_results_to_db,
+                    inputs=[job_id_state],
+                    outputs=[save_status_output],
                 )
 
                 gr.Markdown("---")
                 gr.Markdown("### View All Saved Results")
-                view_all_button = gr.Button("View All Identity Cards")
+                surname_filter = gr.Textbox(label="Surname starts with (optional)")
+                # Cursor of the next page of saved results
+                cursor_state = gr.State(None)
+                with gr.Row():
+                    view_all_button = gr.Button("View All Identity Cards")
+                    next_page_button = gr.Button("Next Page")
                 all_results_output = gr.Textbox(
                     label="All Saved Identity Cards", interactive=False, lines=10
                 )
 
                 view_all_button.click(
                     gradio_get_all_saved_results,
-                    inputs=[],
-                    outputs=[all_results_output],
+                    inputs=[surname_filter],
+                    outputs=[all_results_output, cursor_state],
+                )
+                next_page_button.click(
+                    gradio_get_next_saved_results,
+                    inputs=[surname_filter, cursor_state],
+                    outputs=[all_results_output, cursor_state],
                 )
     return demo
 
@@ -1,6 +1,14 @@
 from ultralytics import YOLO
-import easyocr
+import cv2
+import numpy as np
 import os
+from .model_registry import registry, WEIGHTS_PATH
+from .detectors import DetectorResult, load_detector
+from .preprocessing import prepare_image
+from .metrics import stage_seconds, empty_ocr_fields, invalid_ocr_fields
+from .validators import NUMERIC_ALLOWLISTS, validate_identity_fields
+
+text_labels = ["birth_date", "id_number", "name", "surname"]
 
 
 def train_model():
@@ -17,16 +25,33 @@ def train_model():
     return model
 
 
-def load_model():
+def load_model(weights_path=WEIGHTS_PATH, backend="torch", quantization="none"):
     """
     Load the trained YOLO model from the best weights.
 
+    Parameters
+    ----------
+    weights_path : str, optional
+        Path to the trained weights. Default is `WEIGHTS_PATH`.
+    backend : str, optional
+        "torch" for the ultralytics model, or "onnx" / "openvino" to run an
+        export of the weights on a CPU runtime (see `detectors.load_detector`).
+        Default is "torch".
+    quantization : str, optional
+        "dynamic" or "static" to serve an INT8 version of the exported weights,
+        "none" for FP32. Default is "none".
+
     Returns
     -------
-    YOLO
-        A YOLO model loaded with trained weights.
+    YOLO or ExportedDetector
+        A model loaded with trained weights.
+
+    Notes
+    -----
+    This builds a fresh model on every call. The API serves the shared
+    instance from `model_registry.registry` instead.
     """
-    model = YOLO("runs/detect/train/weights/best.pt")
+    model = load_detector(weights_path, backend, quantization=quantization)
     return model
 
 
@@ -36,31 +61,42 @@ def detect_image(image_path, model):
 
     Parameters
     ----------
-    image_path : str
-        Path to the input image.
-    model : YOLO
-        The YOLO model instance to use for detection.
+    image_path : str, np.ndarray or list
+        Path to the input image, a decoded BGR image, or a list of either to
+        detect as one batch.
+    model : YOLO or ExportedDetector
+        The detector to use, with any backend.
 
     Returns
     -------
     list
-        YOLO detection results.
+        Detection results (ultralytics `Results` or `DetectorResult`), one per input image.
     """
     results = model(image_path)
     return results
 
 
-def validate_model(model):
+def validate_model(model, data=None):
     """
     Run validation on the YOLO model and print mAP metrics.
 
     Parameters
     ----------
     model : YOLO
-        The YOLO model instance to validate.
+        The YOLO model instance to validate, e.g. `YOLO(resolve_detector_path(...))`
+        for an exported or quantized detector.
+    data : str, optional
+        Dataset YAML to validate on. Default is None, which uses the dataset the
+        model was trained on. Exported models need it.
+
+    Returns
+    -------
+    ultralytics.utils.metrics.DetMetrics
+        The validation metrics, e.g. `metrics.box.map` for mAP50-95.
     """
-    metrics = model.val()
+    metrics = model.val() if data is None else model.val(data=data)
     print(metrics.box.maps)
+    return metrics
 
 
 def save_crops(results, output_dir):
@@ -70,14 +106,187 @@ def save_crops(results, output_dir):
     Parameters
     ----------
     results : list
-        YOLO detection results.
+        Detection results, as returned by `detect_image`.
     output_dir : str
         Directory where cropped images will be saved.
     """
-    results[0].save_crop(output_dir)
+    result = results[0]
+    if not isinstance(result, DetectorResult):
+        result.save_crop(output_dir)
+        return
+
+    write_crops(crop_fields(result.orig_img, result.detections, result.names), output_dir)
+
+
+def write_crops(crops, output_dir):
+    """
+    Write field crops to disk in the layout `apply_ocr` reads.
+
+    Parameters
+    ----------
+    crops : dict
+        A dictionary mapping field labels to BGR crops, as returned by `crop_fields`.
+    output_dir : str
+        Directory where cropped images will be saved.
+    """
+    # Same layout as `save_crop`: one `<label>/im.jpg` per detected field
+    for label, crop in crops.items():
+        os.makedirs(os.path.join(output_dir, label), exist_ok=True)
+        cv2.imwrite(os.path.join(output_dir, label, "im.jpg"), crop)
+
+
+def get_detections(result):
+    """
+    Convert a YOLO result into plain NumPy detection arrays.
+
+    Parameters
+    ----------
+    result : ultralytics.engine.results.Results or DetectorResult
+        Detection result for a single image.
+
+    Returns
+    -------
+    dict
+        A dictionary with:
+        - 'boxes' : np.ndarray of shape (N, 4), boxes in (x1, y1, x2, y2) pixel format.
+        - 'classes' : np.ndarray of shape (N,), integer class ids.
+        - 'scores' : np.ndarray of shape (N,), confidence scores.
+    """
+    if isinstance(result, DetectorResult):
+        return result.detections
+    boxes = result.boxes
+    return {
+        "boxes": boxes.xyxy.cpu().numpy(),
+        "classes": boxes.cls.cpu().numpy().astype(int),
+        "scores": boxes.conf.cpu().numpy(),
+    }
 
 
-def apply_ocr(crop_dir, delete_after=True):
+def crop_fields(image, detections, names, gain=1.02, pad=10):
+    """
+    Slice the detected field regions straight out of the decoded image.
+
+    Parameters
+    ----------
+    image : np.ndarray
+        The decoded BGR image the detections refer to.
+    detections : dict
+        Detection arrays as returned by `get_detections`.
+    names : dict
+        Mapping from class id to field label (e.g., `model.names`).
+    gain : float, optional
+        Box size multiplier applied before cropping. Default is 1.02.
+    pad : int, optional
+        Pixels added to the box width and height before cropping. Default is 10.
+
+    Returns
+    -------
+    dict
+        A dictionary mapping field labels to BGR crops (np.ndarray).
+
+    Notes
+    -----
+    - `gain` and `pad` match the margins `save_crop` uses, so OCR sees the same
+      regions as in the file based pipeline, without the JPEG re-encode.
+    - When a field is detected more than once, the highest confidence box is kept,
+      like `apply_ocr` reading only the first `im.jpg` of each label.
+    """
+    height, width = image.shape[:2]
+    crops = {}
+
+    for index in np.argsort(-detections["scores"]):
+        label = names[int(detections["classes"][index])]
+        if label in crops:
+            continue
+
+        x1, y1, x2, y2 = detections["boxes"][index]
+        x_center, y_center = (x1 + x2) / 2, (y1 + y2) / 2
+        half_width = ((x2 - x1) * gain + pad) / 2
+        half_height = ((y2 - y1) * gain + pad) / 2
+        left = int(max(x_center - half_width, 0))
+        top = int(max(y_center - half_height, 0))
+        right = int(min(x_center + half_width, width))
+        bottom = int(min(y_center + half_height, height))
+        if right <= left or bottom <= top:
+            continue
+
+        crops[label] = np.ascontiguousarray(image[top:bottom, left:right])
+
+    return crops
+
+
+def clean_text(label, text):
+    """
+    Drop the characters a numeric field cannot contain.
+
+    Parameters
+    ----------
+    label : str
+        The field label.
+    text : str
+        The recognized text.
+
+    Returns
+    -------
+    str
+        `text` restricted to the allowlist of numeric fields, unchanged for the others.
+    """
+    allowlist = NUMERIC_ALLOWLISTS.get(label)
+    if allowlist is None:
+        return text
+    return "".join(char for char in text if char in allowlist)
+
+
+def recognize_crops(crops, reader=None):
+    """
+    Recognize the text of the field crops of a card.
+
+    Parameters
+    ----------
+    crops : dict
+        A dictionary mapping field labels to BGR crops, as returned by `crop_fields`.
+    reader : easyocr.Reader, optional
+        The OCR reader to use. Defaults to the shared reader from the model registry.
+
+    Returns
+    -------
+    dict
+        A dictionary where keys are field labels and values are extracted text strings.
+        Fields without a crop or without recognized text get an empty string.
+
+    Notes
+    -----
+    - The YOLO box already is the text region, so each crop skips EasyOCR's CRAFT
+      text detector and goes straight to `reader.recognize` as a single text line.
+      `readtext` may split a field into several boxes, of which `apply_ocr` only
+      keeps the first one.
+    - `birth_date` and `id_number` are recognized with a digit allowlist, so a 0
+      is never read as an O, nor a 1 as an l or I. Their values can be checked
+      with `validators.validate_identity_fields`.
+    """
+    if reader is None:
+        reader = registry.get_reader()
+    extracted_texts = {label: "" for label in text_labels}
+
+    for label in text_labels:
+        crop = crops.get(label)
+        if crop is None:
+            continue
+        grey = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+        height, width = grey.shape
+        results = reader.recognize(
+            grey,
+            horizontal_list=[[0, width, 0, height]],
+            free_list=[],
+            allowlist=NUMERIC_ALLOWLISTS.get(label),
+        )
+        if results:
+            extracted_texts[label] = clean_text(label, results[0][1])
+
+    return extracted_texts
+
+
+def apply_ocr(crop_dir, delete_after=True, reader=None):
     """
     Apply EasyOCR to cropped images and extract text from identity fields.
 
@@ -87,6 +296,8 @@ def apply_ocr(crop_dir, delete_after=True):
         Path to the directory containing cropped image folders (e.g., 'name/im.jpg').
     delete_after : bool, optional
         Whether to delete the cropped image after extracting text. Default is True.
+    reader : easyocr.Reader, optional
+        The OCR reader to use. Defaults to the shared reader from the model registry.
 
     Returns
     -------
@@ -101,15 +312,15 @@ def apply_ocr(crop_dir, delete_after=True):
     - Optionally deletes the cropped images after OCR to reduce disk usage or protect sensitive data.
     """
 
-    reader = easyocr.Reader(["tr", "en"])
-    text_labels = ["birth_date", "id_number", "name", "surname"]
+    if reader is None:
+        reader = registry.get_reader()
     extracted_texts = {}
 
     for label in text_labels:
         label_path = os.path.join(crop_dir, label, "im.jpg")
         if os.path.exists(label_path):
-            result = reader.readtext(label_path)
-            extracted_texts[label] = result[0][1] if result else ""
+            result = reader.readtext(label_path, allowlist=NUMERIC_ALLOWLISTS.get(label))
+            extracted_texts[label] = clean_text(label, result[0][1]) if result else ""
             if delete_after:
                 os.remove(label_path)
         else:
@@ -118,29 +329,143 @@ def apply_ocr(crop_dir, delete_after=True):
     return extracted_texts
 
 
-def extract_inference(image_path, crop_output_dir):
+def count_empty_fields(extracted_texts):
     """
-    Full pipeline: load model, detect fields, crop, apply OCR, and print results.
+    Count the fields for which OCR returned no text in the metrics.
 
     Parameters
     ----------
-    image_path : str
-        Path to the identity image to process.
-    crop_output_dir : str
-        Directory to store cropped fields.
+    extracted_texts : dict
+        OCR results keyed by field label.
+    """
+    for label, text in extracted_texts.items():
+        if not text:
+            empty_ocr_fields.inc(field=label)
+
+
+def count_invalid_fields(extracted_texts):
+    """
+    Count the recognized numeric fields that fail validation in the metrics.
+
+    Parameters
+    ----------
+    extracted_texts : dict
+        OCR results keyed by field label.
+    """
+    errors = validate_identity_fields(
+        extracted_texts["id_number"], extracted_texts["birth_date"]
+    )
+    labels = {"identity_number": "id_number", "birth_date": "birth_date"}
+    for field in errors:
+        if extracted_texts[labels[field]]:
+            invalid_ocr_fields.inc(field=labels[field])
+
+
+def extract_inference(image_path, crop_output_dir=None, on_stage=None):
+    """
+    Full pipeline: detect fields, crop, apply OCR, and print results.
+
+    Parameters
+    ----------
+    image_path : str, bytes or np.ndarray
+        Path to the identity image to process, its encoded content, or the
+        decoded BGR image.
+    crop_output_dir : str, optional
+        Directory to store cropped fields. If None (default), the fields are
+        cropped from the decoded image in memory and no file is written.
+    on_stage : callable, optional
+        Called with the name of each stage ("detecting", then "ocr") as it starts,
+        e.g. to report progress of a queued job.
 
     Returns
     -------
     dict
         Final extracted OCR results.
+
+    Notes
+    -----
+    - The detector and the OCR reader come from the process-wide model registry,
+      so only the first call pays for loading them.
+    - The in-memory mode shares no state between calls, so concurrent requests
+      cannot overwrite each other's crops.
+    - The image is decoded upright at a capped resolution (see
+      `preprocessing.prepare_image`) and the detector runs on a copy downscaled
+      to its input size. Only the boxes are mapped back to the working image to
+      cut the OCR crops, so the cost per card does not grow with the camera
+      resolution.
     """
-    model = load_model()
-    results = detect_image(image_path, model)
-    save_crops(results, crop_output_dir)
-    extracted_texts = apply_ocr(crop_output_dir)
-    print(extracted_texts)
+    if on_stage is not None:
+        on_stage("detecting")
+    with stage_seconds.time(stage="preprocess"):
+        prepared = prepare_image(image_path)
+    with registry.detector() as model, stage_seconds.time(stage="detect"):
+        results = detect_image(prepared.detect_image, model)
+        names = model.names
+
+    if on_stage is not None:
+        on_stage("ocr")
+    with stage_seconds.time(stage="crop"):
+        detections = prepared.to_image_coordinates(get_detections(results[0]))
+        crops = crop_fields(prepared.image, detections, names)
+    if crop_output_dir is None:
+        with stage_seconds.time(stage="ocr"):
+            extracted_texts = recognize_crops(crops)
+    else:
+        with stage_seconds.time(stage="save_crops"):
+            write_crops(crops, crop_output_dir)
+        with stage_seconds.time(stage="ocr"):
+            extracted_texts = apply_ocr(crop_output_dir)
+    count_empty_fields(extracted_texts)
+    count_invalid_fields(extracted_texts)
     return extracted_texts
 
 
-text_labels = ["birth_date", "id_number", "name", "surname"]
+def extract_inference_batch(images, batch_size=None):
+    """
+    Batched pipeline: detect the fields of several cards at once and OCR them.
+
+    Parameters
+    ----------
+    images : list
+        Identity images to process, as file paths, encoded contents or decoded
+        BGR arrays.
+    batch_size : int, optional
+        Maximum number of images sent to the detector in one forward pass.
+        Default is None, which sends all images at once.
+
+    Returns
+    -------
+    list of dict
+        Extracted OCR results, one dictionary per image, in input order.
+
+    Notes
+    -----
+    Passing a list to the YOLO model stacks the letterboxed images into a single
+    batch tensor, so the detector runs one forward pass per chunk instead of one
+    per image. Every image goes through `preprocessing.prepare_image` first, like
+    in `extract_inference`.
+    """
+    batch_size = batch_size or len(images)
+    batch_texts = []
+
+    for start in range(0, len(images), batch_size):
+        with stage_seconds.time(stage="preprocess"):
+            prepared = [prepare_image(image) for image in images[start : start + batch_size]]
+        with registry.detector() as model, stage_seconds.time(stage="detect_batch"):
+            results = detect_image([item.detect_image for item in prepared], model)
+            names = model.names
+
+        for item, result in zip(prepared, results):
+            with stage_seconds.time(stage="crop"):
+                detections = item.to_image_coordinates(get_detections(result))
+                crops = crop_fields(item.image, detections, names)
+            with stage_seconds.time(stage="ocr"):
+                extracted_texts = recognize_crops(crops)
+            count_empty_fields(extracted_texts)
+            count_invalid_fields(extracted_texts)
+            batch_texts.append(extracted_texts)
+
+    return batch_texts
+
+
 # extract_inference("sample.png", "crops")
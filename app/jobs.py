@@ -0,0 +1,171 @@
+import os
+import threading
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime
+
+MAX_JOBS = int(os.getenv("MAX_JOBS", "1000"))
+
+# Job lifecycle: uploads start as "uploaded", queued jobs go through
+# "queued" -> "detecting" -> "ocr" and end as "done" or "failed".
+FINISHED_STATUSES = ("done", "failed")
+# Jobs whose image is waiting for or going through inference, never evicted.
+RUNNING_STATUSES = ("queued", "detecting", "ocr")
+
+
+class JobNotFoundError(KeyError):
+    """Raised when a job id is unknown or has been evicted."""
+
+    def __init__(self, job_id):
+        super().__init__(job_id)
+        self.job_id = job_id
+
+    def __str__(self):
+        return f"Job {self.job_id} not found"
+
+
+class JobStore:
+    """
+    In-memory job table shared by the upload, inference and save steps.
+
+    Every upload creates a job whose id is returned to the client and passed
+    back to the later steps, so concurrent sessions never see each other's
+    files or results. Lookups are O(1) dictionary accesses.
+
+    Parameters
+    ----------
+    max_jobs : int, optional
+        Maximum number of jobs kept. When exceeded, the oldest job that is not
+        running is evicted and its uploaded image is deleted. Default is `MAX_JOBS`.
+
+    Notes
+    -----
+    - Each job is a dictionary with the keys 'job_id', 'image_path',
+      'content_hash', 'status', 'result', 'error' and 'created_at'. `get`
+      returns a copy, so callers cannot mutate the stored job outside the lock.
+    - Jobs in `RUNNING_STATUSES` are skipped by the eviction, so an image is
+      never deleted while inference is about to read it. The store may hold
+      more than `max_jobs` jobs while they all run.
+    - Uploads are stored under their content hash, so several jobs may share
+      one image. The image is deleted only when the last job using it goes.
+      Reference counts, moving an upload in place and deleting an unused image
+      all happen under the lock, so a new job cannot lose its image to a
+      concurrent release.
+    """
+
+    def __init__(self, max_jobs=MAX_JOBS):
+        self.max_jobs = max(1, max_jobs)
+        self._jobs = OrderedDict()
+        self._image_refs = Counter()
+        self._lock = threading.Lock()
+
+    def create(self, image_path=None, content_hash=None, status="uploaded", staged_path=None):
+        """
+        Register a new job.
+
+        Parameters
+        ----------
+        image_path : str, optional
+            Path of the uploaded image, if already known.
+        content_hash : str, optional
+            SHA-256 hex digest of the uploaded image.
+        status : str, optional
+            Initial status of the job. Default is "uploaded".
+        staged_path : str, optional
+            Temporary file holding the upload, moved to `image_path` under the lock.
+
+        Returns
+        -------
+        str
+            The new job id.
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "image_path": image_path,
+            "content_hash": content_hash,
+            "status": status,
+            "result": None,
+            "error": None,
+            "created_at": datetime.now(),
+        }
+        with self._lock:
+            if staged_path is not None:
+                os.replace(staged_path, image_path)
+            self._jobs[job_id] = job
+            self._retain_image(image_path)
+            while len(self._jobs) > self.max_jobs:
+                old_job_id = next(
+                    (
+                        old_job_id
+                        for old_job_id, old_job in self._jobs.items()
+                        if old_job["status"] not in RUNNING_STATUSES
+                        and old_job_id != job_id
+                    ),
+                    None,
+                )
+                if old_job_id is None:
+                    break
+                self._release_image(self._jobs.pop(old_job_id)["image_path"])
+        return job_id
+
+    def get(self, job_id):
+        """
+        Return a copy of a job.
+
+        Raises
+        ------
+        JobNotFoundError
+            If the job id is unknown or has been evicted.
+        """
+        with self._lock:
+            try:
+                return dict(self._jobs[job_id])
+            except KeyError:
+                raise JobNotFoundError(job_id) from None
+
+    def update(self, job_id, **fields):
+        """
+        Update fields of a job.
+
+        Raises
+        ------
+        JobNotFoundError
+            If the job id is unknown or has been evicted.
+        """
+        with self._lock:
+            try:
+                job = self._jobs[job_id]
+            except KeyError:
+                raise JobNotFoundError(job_id) from None
+            if "image_path" in fields and fields["image_path"] != job["image_path"]:
+                self._retain_image(fields["image_path"])
+                self._release_image(job["image_path"])
+            job.update(fields)
+
+    def delete(self, job_id):
+        """
+        Remove a job and its uploaded image. Unknown ids are ignored.
+        """
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is not None:
+                self._release_image(job["image_path"])
+
+    def _retain_image(self, image_path):
+        if image_path:
+            self._image_refs[image_path] += 1
+
+    def _release_image(self, image_path):
+        # Deletes the image once no job references it anymore. Called under the lock.
+        if not image_path:
+            return
+        self._image_refs[image_path] -= 1
+        if self._image_refs[image_path] > 0:
+            return
+        del self._image_refs[image_path]
+        if os.path.exists(image_path):
+            os.remove(image_path)
+
+
+job_store = JobStore()
@@ -1,75 +1,292 @@
+import os
+import json
+import time
+import asyncio
+import secrets
+import logging
+from contextlib import asynccontextmanager
 import gradio as gr
-from fastapi import FastAPI, UploadFile, Depends
-from .database import engine, get_db
-from sqlalchemy.orm import Session
-from .models import Base, IdentityCard
+from datetime import date
+from fastapi import FastAPI, UploadFile, Depends, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+from .database import async_engine, engine, get_async_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from .models import Base, create_indexes
 from .crud import (
-    save_uploaded_file,
-    create_upload_directory,
-    save_inference_result_to_json,
-    save_identity_card_from_json,
+    async_bulk_save_identity_cards,
+    async_list_identity_cards,
+    async_save_inference_result,
+    iter_identity_card_export,
+    create_upload_job,
     show_inference_result,
-    delete_existing_png_files,
-    create_json_file,
-    get_latest_path,
-    delete_content_in_json
-    
+    show_inference_results_batch,
+    submit_inference_job,
+    DuplicateIdentityCardError,
+    UploadTooLargeError,
+    BATCH_MAX_FILES,
+    LIST_PAGE_SIZE,
+    LIST_MAX_PAGE_SIZE,
+    EXPORT_MEDIA_TYPES,
+)
+from typing import Annotated, List, Literal
+from .schemas import (
+    BulkIdentityCardRequest,
+    BulkSaveResponse,
+    IdentityCardPage,
+    InferenceResultResponse,
+    IdentityCardResponse,
+    JobStatusResponse,
 )
-from typing import Annotated, List
-from .schemas import IdentityCardRequest, IdentityCardResponse
 from .gradio_ui import create_gradio_ui
+from .model_registry import registry, resolve_weights_path
+from .workers import inference_pool, PoolFullError
+from .jobs import job_store, JobNotFoundError, FINISHED_STATUSES
+from .cache import result_cache
+from .metrics import metrics_registry, http_requests, http_request_seconds
+
+logger = logging.getLogger(__name__)
+
+# Set PRELOAD_MODELS=0 to skip loading the models at startup (they then load on first use).
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "1") == "1"
+# Seconds between job status checks in the server-sent event stream.
+JOB_EVENTS_POLL_INTERVAL = float(os.getenv("JOB_EVENTS_POLL_INTERVAL", "0.2"))
+# Seconds after which the event stream of a job that has not finished is closed.
+JOB_EVENTS_TIMEOUT = float(os.getenv("JOB_EVENTS_TIMEOUT", "300"))
+# Token expected in the X-Reload-Token header of the reload endpoint. The
+# endpoint is disabled when it is not set.
+MODEL_RELOAD_TOKEN = os.getenv("MODEL_RELOAD_TOKEN")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if PRELOAD_MODELS:
+        try:
+            await run_in_threadpool(registry.warm_up)
+        except Exception:
+            logger.exception("Model warm-up failed, models will be loaded on first use")
+    yield
+    inference_pool.shutdown()
+    await async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template rather than raw path to keep job ids out of the labels
+    route = request.scope.get("route")
+    route_path = getattr(route, "path", "unmatched")
+    http_requests.inc(method=request.method, route=route_path, status=response.status_code)
+    http_request_seconds.observe(
+        time.perf_counter() - start, method=request.method, route=route_path
+    )
+    return response
+
+
+@app.exception_handler(PoolFullError)
+async def pool_full_handler(request: Request, exc: PoolFullError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(UploadTooLargeError)
+async def upload_too_large_handler(request: Request, exc: UploadTooLargeError):
+    return JSONResponse(status_code=413, content={"detail": str(exc)})
+
+
+@app.exception_handler(DuplicateIdentityCardError)
+async def duplicate_identity_card_handler(request: Request, exc: DuplicateIdentityCardError):
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
+
+
+@app.exception_handler(JobNotFoundError)
+async def job_not_found_handler(request: Request, exc: JobNotFoundError):
+    return JSONResponse(status_code=404, content={"detail": str(exc)})
 
-app = FastAPI()
 
 Base.metadata.create_all(bind=engine)
-db_dependency = Annotated[Session, Depends(get_db)]
+create_indexes(engine)
+db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 
 @app.post("/identity_cards/save_file/")
 async def save_file(file: UploadFile):
-    file_dir = create_upload_directory()
-    delete_existing_png_files(file_dir)
-    file_full_path = save_uploaded_file(file, file_dir)
-    return {"message": file_full_path}
+    # Writing the upload to disk runs in a thread to keep the event loop free
+    job_id, file_full_path = await run_in_threadpool(create_upload_job, file)
+    return {"message": file_full_path, "job_id": job_id}
 
 
-@app.get("/identity_cards/show_inference_results/", response_model=IdentityCardRequest)
-async def show_inference_results():
+@app.get(
+    "/identity_cards/show_inference_results/", response_model=InferenceResultResponse
+)
+async def show_inference_results(job_id: str):
+    result = await show_inference_result(job_id)
+    return result
 
-    save_dir = "app/upload_file"
 
-    result = show_inference_result()
-    json_file_path = get_latest_path(file_type="json")
-    if not json_file_path:        
-        json_file_path = create_json_file(save_dir)
-    else:
-        delete_content_in_json(json_file_path)
-    save_inference_result_to_json(result, json_file_path)
-    return result
+@app.post("/identity_cards/show_inference_results_batch/")
+async def show_inference_results_in_batch(files: List[UploadFile]):
+    if len(files) > BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=413, detail=f"At most {BATCH_MAX_FILES} files per batch"
+        )
+    try:
+        results = await inference_pool.run(show_inference_results_batch, files)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return results
+
+
+@app.post("/identity_cards/jobs", response_model=JobStatusResponse, status_code=202)
+async def create_job(file: UploadFile):
+    job_id = await run_in_threadpool(submit_inference_job, file)
+    return job_store.get(job_id)
+
+
+@app.get("/identity_cards/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    return job_store.get(job_id)
+
+
+@app.get("/identity_cards/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    job_store.get(job_id)
+
+    async def events():
+        # Every stream ends with a final event: the finished status, "error"
+        # when the job is evicted, or "timeout" after JOB_EVENTS_TIMEOUT seconds.
+        deadline = time.monotonic() + JOB_EVENTS_TIMEOUT
+        last_status = None
+        while True:
+            try:
+                job = job_store.get(job_id)
+            except JobNotFoundError as e:
+                yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+                return
+            if job["status"] != last_status:
+                last_status = job["status"]
+                data = JobStatusResponse(**job).model_dump_json()
+                yield f"event: status\ndata: {data}\n\n"
+            if last_status in FINISHED_STATUSES:
+                return
+            if time.monotonic() >= deadline:
+                data = JobStatusResponse(**job).model_dump_json()
+                yield f"event: timeout\ndata: {data}\n\n"
+                return
+            await asyncio.sleep(JOB_EVENTS_POLL_INTERVAL)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"}
+    )
 
 
 @app.post(
     "/identity_cards/save_inference_results/", response_model=IdentityCardResponse
 )
-async def save_inference_results(db: db_dependency):
-    identity_card = save_identity_card_from_json()
-    db.add(identity_card)
-    db.commit()
-    db.refresh(identity_card)
+async def save_inference_results(job_id: str, db: db_dependency):
+    try:
+        return await async_save_inference_result(db, job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
-    return identity_card
 
+@app.post("/identity_cards/bulk_save/", response_model=BulkSaveResponse)
+async def bulk_save(request: BulkIdentityCardRequest, db: db_dependency):
+    return await async_bulk_save_identity_cards(db, request.cards, request.on_conflict)
+
+
+@app.post("/identity_cards/reload_model/")
+async def reload_model(
+    weights_path: str | None = None,
+    x_reload_token: Annotated[str | None, Header()] = None,
+):
+    if not MODEL_RELOAD_TOKEN:
+        raise HTTPException(
+            status_code=403, detail="Model reload is disabled, set MODEL_RELOAD_TOKEN"
+        )
+    if x_reload_token is None or not secrets.compare_digest(
+        x_reload_token, MODEL_RELOAD_TOKEN
+    ):
+        raise HTTPException(status_code=401, detail="Invalid reload token")
+    try:
+        if weights_path is not None:
+            weights_path = resolve_weights_path(weights_path)
+        version = await run_in_threadpool(registry.reload_model, weights_path)
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"message": registry.weights_path, "version": version}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(
+        metrics_registry.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
+@app.get("/identity_cards/cache_stats/")
+async def cache_stats():
+    return result_cache.stats()
+
+
+@app.get("/identity_cards/get_inference_results", response_model=IdentityCardPage)
+async def get_inference_results(
+    db: db_dependency,
+    limit: int = Query(LIST_PAGE_SIZE, ge=1, le=LIST_MAX_PAGE_SIZE),
+    cursor: int | None = None,
+    created_from: date | None = None,
+    created_to: date | None = None,
+    surname_prefix: str | None = None,
+    birth_date: date | None = None,
+):
+    return await async_list_identity_cards(
+        db,
+        limit,
+        cursor=cursor,
+        created_from=created_from,
+        created_to=created_to,
+        surname_prefix=surname_prefix,
+        birth_date=birth_date,
+    )
 
-@app.get(
-    "/identity_cards/get_inference_results", response_model=List[IdentityCardResponse]
-)
-async def get_inference_results(db: db_dependency):
-    results = db.query(IdentityCard).all()
-    return results
 
+@app.get("/identity_cards/export")
+async def export_identity_cards(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    created_from: date | None = None,
+    created_to: date | None = None,
+    surname_prefix: str | None = None,
+    birth_date: date | None = None,
+):
+    rows = iter_identity_card_export(
+        export_format,
+        created_from=created_from,
+        created_to=created_to,
+        surname_prefix=surname_prefix,
+        birth_date=birth_date,
+    )
+    return StreamingResponse(
+        rows,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="identity_cards.{export_format}"'
+        },
+    )
 
 # 1. Call the function from gradio_ui.py to get the Gradio Blocks object
-gradio_app_instance = create_gradio_ui()
+#    Mounted, the UI calls the API functions directly instead of looping back over HTTP.
+gradio_app_instance = create_gradio_ui(mounted=True)
 
 # 2. Mount the Gradio app to your FastAPI app at the /gradio path
 #    Now, when you go to http://127.0.0.1:8000/gradio, you'll see the Gradio UI.
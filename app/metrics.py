@@ -0,0 +1,212 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from a cache hit to a cold model load.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = list(zip(labelnames, key))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """
+    Monotonic counter with optional labels, rendered in Prometheus text format.
+
+    Parameters
+    ----------
+    name : str
+        Metric name.
+    documentation : str
+        Help text of the metric.
+    labelnames : tuple of str, optional
+        Names of the labels passed to `inc`.
+    """
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """
+        Increase the counter of the given label values by `amount`.
+        """
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    Cumulative histogram with optional labels, rendered in Prometheus text format.
+
+    Parameters
+    ----------
+    name : str
+        Metric name.
+    documentation : str
+        Help text of the metric.
+    labelnames : tuple of str, optional
+        Names of the labels passed to `observe`.
+    buckets : tuple of float, optional
+        Upper bounds of the buckets. Default is `DEFAULT_BUCKETS`.
+
+    Notes
+    -----
+    `observe` only finds the bucket with a binary search and bumps two numbers
+    under a lock, so timing a stage costs a few microseconds.
+    """
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """
+        Record one observation for the given label values.
+        """
+        key = _label_key(self.labelnames, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, (None, 0.0))
+            if counts is None:
+                counts = [0] * (len(self.buckets) + 1)
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observe the duration of the `with` block, in seconds.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    labels = _format_labels(self.labelnames, key, ("le", le))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics exposed together on the `/metrics` endpoint.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """
+        Render every registered metric in the Prometheus text exposition format.
+
+        Returns
+        -------
+        str
+            The exposition text.
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+http_requests = metrics_registry.register(
+    Counter(
+        "identity_scan_http_requests_total",
+        "HTTP requests handled, by route and status code.",
+        ("method", "route", "status"),
+    )
+)
+http_request_seconds = metrics_registry.register(
+    Histogram(
+        "identity_scan_http_request_seconds",
+        "HTTP request latency in seconds, by route.",
+        ("method", "route"),
+    )
+)
+stage_seconds = metrics_registry.register(
+    Histogram(
+        "identity_scan_stage_seconds",
+        "Latency of the inference pipeline stages in seconds.",
+        ("stage",),
+    )
+)
+inference_failures = metrics_registry.register(
+    Counter(
+        "identity_scan_inference_failures_total",
+        "Inference runs that raised an error.",
+    )
+)
+empty_ocr_fields = metrics_registry.register(
+    Counter(
+        "identity_scan_empty_ocr_fields_total",
+        "Fields for which OCR returned no text, by field.",
+        ("field",),
+    )
+)
+invalid_ocr_fields = metrics_registry.register(
+    Counter(
+        "identity_scan_invalid_ocr_fields_total",
+        "Numeric fields whose OCR text fails validation, by field.",
+        ("field",),
+    )
+)
+cache_lookups = metrics_registry.register(
+    Counter(
+        "identity_scan_cache_lookups_total",
+        "Result cache lookups, by result (hit or miss).",
+        ("result",),
+    )
+)
@@ -0,0 +1,279 @@
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import easyocr
+
+from .detectors import DETECTOR_BACKEND, DETECTOR_QUANTIZATION, load_detector
+from .metrics import stage_seconds
+from .preprocessing import DETECT_IMAGE_SIDE, MAX_IMAGE_SIDE
+from .validators import NUMERIC_ALLOWLISTS
+
+WEIGHTS_PATH = os.getenv("YOLO_WEIGHTS_PATH", "runs/detect/train/weights/best.pt")
+# Directory the reload endpoint may load weights from. Loading a checkpoint
+# unpickles it, so paths outside this directory are refused.
+WEIGHTS_DIR = os.getenv("YOLO_WEIGHTS_DIR", os.path.dirname(WEIGHTS_PATH))
+OCR_LANGUAGES = ["tr", "en"]
+# EasyOCR applies dynamic INT8 quantization to the recognizer on CPU. Set
+# OCR_QUANTIZE=0 to run it in FP32, e.g. as the accuracy baseline.
+OCR_QUANTIZE = os.getenv("OCR_QUANTIZE", "1") == "1"
+# Bump when a change to the pre-processing, the cropping or the OCR post-processing
+# changes the extracted texts, so that cached results of the old pipeline are not served.
+PIPELINE_VERSION = 2
+
+
+def fingerprint_file(path, length=16):
+    """
+    Compute a short SHA-256 fingerprint of a file.
+
+    Parameters
+    ----------
+    path : str
+        Path of the file to hash.
+    length : int, optional
+        Number of hex characters kept. Default is 16.
+
+    Returns
+    -------
+    str
+        The first `length` hex characters of the file digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:length]
+
+
+def resolve_weights_path(weights_path, weights_dir=WEIGHTS_DIR):
+    """
+    Resolve a weights path requested through the API, inside `weights_dir`.
+
+    Parameters
+    ----------
+    weights_path : str
+        A file name, taken in `weights_dir`, or a path relative to the working
+        directory.
+    weights_dir : str, optional
+        The directory holding the servable weights. Default is `WEIGHTS_DIR`.
+
+    Returns
+    -------
+    str
+        The resolved path.
+
+    Raises
+    ------
+    PermissionError
+        If the path is not a `.pt` file inside `weights_dir`, symlinks resolved.
+    """
+    root = os.path.realpath(weights_dir)
+    if not os.path.dirname(weights_path):
+        weights_path = os.path.join(weights_dir, weights_path)
+    path = os.path.realpath(weights_path)
+    if os.path.commonpath([root, path]) != root or not path.endswith(".pt"):
+        raise PermissionError(f"Weights must be a .pt file in {weights_dir}")
+    return path
+
+
+class ModelRegistry:
+    """
+    Process-wide holder for the YOLO detector and the EasyOCR reader.
+
+    Both models are loaded once, either eagerly through `warm_up` (called at
+    FastAPI startup) or lazily on first use, and are then shared by every
+    request. The detector weights can be swapped at runtime with
+    `reload_model` without restarting the server.
+
+    Parameters
+    ----------
+    weights_path : str, optional
+        Path to the YOLO weights to serve. Defaults to `WEIGHTS_PATH`.
+    languages : list of str, optional
+        Languages passed to `easyocr.Reader`. Defaults to `OCR_LANGUAGES`.
+    backend : str, optional
+        Detector backend passed to `load_detector` ("torch", "onnx" or
+        "openvino"). Defaults to `DETECTOR_BACKEND`.
+    quantization : str, optional
+        INT8 quantization of the exported detector ("none", "dynamic" or
+        "static"). Defaults to `DETECTOR_QUANTIZATION`.
+
+    Notes
+    -----
+    - An ultralytics `YOLO` object keeps predictor state between calls, so
+      detections must go through the `detector()` context manager, which
+      serializes access to the shared instance.
+    - The EasyOCR reader holds no per-call state and is shared without a lock.
+    - A hot swap loads the new weights before taking the registry lock, so
+      in-flight detections finish on the old model and the next one picks up
+      the new model.
+    """
+
+    def __init__(
+        self,
+        weights_path=WEIGHTS_PATH,
+        languages=None,
+        backend=DETECTOR_BACKEND,
+        quantization=DETECTOR_QUANTIZATION,
+    ):
+        self._weights_path = weights_path
+        self._languages = languages or OCR_LANGUAGES
+        self._backend = backend
+        self._quantization = quantization
+        self._model = None
+        self._reader = None
+        self._version = 0
+        self._weights_version = None
+        self._lock = threading.Lock()
+        self._detect_lock = threading.Lock()
+
+    @property
+    def weights_path(self):
+        """str: Path of the weights currently served by the detector."""
+        return self._weights_path
+
+    @property
+    def backend(self):
+        """str: Detector backend serving the weights."""
+        return self._backend
+
+    @property
+    def version(self):
+        """int: Counter incremented every time the detector weights are swapped."""
+        return self._version
+
+    @property
+    def weights_version(self):
+        """str: Fingerprint of the served weights, detector backend and OCR pipeline, stable across restarts."""
+        if self._weights_version is None:
+            with self._lock:
+                if self._weights_version is None:
+                    self._weights_version = self._fingerprint(self._weights_path)
+        return self._weights_version
+
+    def _fingerprint(self, weights_path):
+        # Exported and quantized backends may shift boxes slightly, so their results are cached apart
+        fingerprint = fingerprint_file(weights_path)
+        if self._backend != "torch":
+            fingerprint = f"{fingerprint}-{self._backend}"
+        if self._quantization != "none":
+            fingerprint = f"{fingerprint}-int8-{self._quantization}"
+        return f"{fingerprint}-ocr-{self._pipeline_fingerprint()}"
+
+    def _pipeline_fingerprint(self):
+        # Everything besides the weights that changes the extracted texts
+        config = {
+            "languages": self._languages,
+            "ocr_quantize": OCR_QUANTIZE,
+            "allowlists": NUMERIC_ALLOWLISTS,
+            "max_image_side": MAX_IMAGE_SIDE,
+            "detect_image_side": DETECT_IMAGE_SIDE,
+            "pipeline_version": PIPELINE_VERSION,
+        }
+        return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:8]
+
+    def get_model(self):
+        """
+        Return the shared YOLO model, loading it on first use.
+
+        Returns
+        -------
+        YOLO or ExportedDetector
+            The detector loaded with the registry weights and backend.
+        """
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    with stage_seconds.time(stage="detector_load"):
+                        self._model = load_detector(
+                            self._weights_path, self._backend, quantization=self._quantization
+                        )
+                    self._version += 1
+        return self._model
+
+    def get_reader(self):
+        """
+        Return the shared EasyOCR reader, loading it on first use.
+
+        Returns
+        -------
+        easyocr.Reader
+            The EasyOCR reader for the registry languages.
+        """
+        if self._reader is None:
+            with self._lock:
+                if self._reader is None:
+                    with stage_seconds.time(stage="reader_load"):
+                        self._reader = easyocr.Reader(self._languages, quantize=OCR_QUANTIZE)
+        return self._reader
+
+    @contextmanager
+    def detector(self):
+        """
+        Borrow the shared YOLO model for the duration of a detection.
+
+        Yields
+        ------
+        YOLO or ExportedDetector
+            The detector, held exclusively by the caller until the block exits.
+        """
+        with self._detect_lock:
+            yield self.get_model()
+
+    def reload_model(self, weights_path=None):
+        """
+        Hot-swap the detector weights.
+
+        Parameters
+        ----------
+        weights_path : str, optional
+            Path to the new weights. Defaults to reloading the current path,
+            which picks up a retrained `best.pt` written in place.
+
+        Returns
+        -------
+        int
+            The new detector version.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the weights file does not exist. The current model is kept.
+        ValueError
+            If the file cannot be loaded as detector weights. The current model is kept.
+
+        Notes
+        -----
+        The path is trusted as is, callers taking it from a request must check it
+        with `resolve_weights_path` first.
+        """
+        weights_path = weights_path or self._weights_path
+        if not os.path.exists(weights_path):
+            raise FileNotFoundError(f"Weights file not found: {weights_path}")
+
+        try:
+            with stage_seconds.time(stage="detector_load"):
+                model = load_detector(
+                    weights_path, self._backend, quantization=self._quantization
+                )
+        except Exception as e:
+            raise ValueError(f"Could not load weights {weights_path}: {e}") from e
+        weights_version = self._fingerprint(weights_path)
+        with self._lock:
+            self._model = model
+            self._weights_path = weights_path
+            self._weights_version = weights_version
+            self._version += 1
+            return self._version
+
+    def warm_up(self):
+        """
+        Load the detector and the OCR reader ahead of the first request.
+        """
+        self.get_model()
+        self.get_reader()
+
+
+registry = ModelRegistry()
@@ -0,0 +1,149 @@
+import io
+import math
+import os
+
+import cv2
+import numpy as np
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .detectors import DETECTOR_IMAGE_SIZE
+
+# Longest side of the working image the OCR crops are cut from. Larger uploads
+# are decoded at a reduced resolution when the format allows it, then downscaled.
+MAX_IMAGE_SIDE = int(os.getenv("MAX_IMAGE_SIDE", "1920"))
+# Longest side of the image given to the detector. The detector letterboxes its
+# input to DETECTOR_IMAGE_SIZE, so anything larger is only resized again.
+DETECT_IMAGE_SIDE = int(os.getenv("DETECT_IMAGE_SIDE", str(DETECTOR_IMAGE_SIZE)))
+
+
+class PreparedImage:
+    """
+    An identity card image decoded for the pipeline, at two resolutions.
+
+    Parameters
+    ----------
+    image : np.ndarray
+        The working BGR image, at most `MAX_IMAGE_SIDE` pixels on its longest
+        side. The OCR crops are cut from it.
+    detect_image : np.ndarray
+        `image` downscaled to at most `DETECT_IMAGE_SIDE` pixels, for the detector.
+    """
+
+    def __init__(self, image, detect_image):
+        self.image = image
+        self.detect_image = detect_image
+        self.scale_x = image.shape[1] / detect_image.shape[1]
+        self.scale_y = image.shape[0] / detect_image.shape[0]
+
+    def to_image_coordinates(self, detections):
+        """
+        Map detections on `detect_image` to the pixels of `image`.
+
+        Parameters
+        ----------
+        detections : dict
+            Detection arrays, as returned by `inference.get_detections`.
+
+        Returns
+        -------
+        dict
+            The same detections with their boxes scaled to `image`.
+        """
+        scale = np.array([self.scale_x, self.scale_y, self.scale_x, self.scale_y])
+        return {**detections, "boxes": detections["boxes"] * scale}
+
+
+def resize_to_fit(image, max_side):
+    """
+    Downscale an image so that its longest side is at most `max_side` pixels.
+
+    Parameters
+    ----------
+    image : np.ndarray
+        The BGR image.
+    max_side : int
+        Maximum length of the longest side.
+
+    Returns
+    -------
+    np.ndarray
+        The downscaled image, or `image` itself when it already fits.
+    """
+    height, width = image.shape[:2]
+    ratio = max_side / max(height, width)
+    if ratio >= 1:
+        return image
+    size = (max(round(width * ratio), 1), max(round(height * ratio), 1))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def load_image(source, max_side=MAX_IMAGE_SIDE):
+    """
+    Decode an image upright and at a capped resolution.
+
+    Parameters
+    ----------
+    source : str, bytes, bytearray, file object or np.ndarray
+        Path to the image, its encoded content, a binary file object positioned
+        at its start, or an already decoded BGR image.
+    max_side : int, optional
+        Maximum length of the longest side. Default is `MAX_IMAGE_SIDE`.
+
+    Returns
+    -------
+    np.ndarray
+        The BGR image, rotated as its EXIF orientation says.
+
+    Raises
+    ------
+    ValueError
+        If `source` cannot be decoded as an image.
+
+    Notes
+    -----
+    - JPEG images are decoded by libjpeg at 1/2, 1/4 or 1/8 of their size when
+      the result still covers `max_side`, so a phone photo is never held in
+      memory at full resolution. Other formats are decoded fully, then downscaled.
+    - Decoded arrays are assumed upright and are only downscaled.
+    """
+    if isinstance(source, np.ndarray):
+        return resize_to_fit(source, max_side)
+
+    is_path = isinstance(source, str)
+    if not is_path and not hasattr(source, "read"):
+        source = io.BytesIO(source)
+    try:
+        with Image.open(source) as pil_image:
+            width, height = pil_image.size
+            ratio = max_side / max(width, height)
+            if ratio < 1:
+                pil_image.draft("RGB", (math.ceil(width * ratio), math.ceil(height * ratio)))
+            rgb = np.asarray(ImageOps.exif_transpose(pil_image).convert("RGB"))
+    except FileNotFoundError:
+        raise
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"{source if is_path else 'Upload'} is not a valid image") from e
+
+    return resize_to_fit(cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR), max_side)
+
+
+def prepare_image(source, max_side=MAX_IMAGE_SIDE, detect_side=DETECT_IMAGE_SIDE):
+    """
+    Decode an image and derive the downscaled copy the detector runs on.
+
+    Parameters
+    ----------
+    source : str, bytes, bytearray, file object or np.ndarray
+        The image, in any form accepted by `load_image`.
+    max_side : int, optional
+        Longest side of the working image. Default is `MAX_IMAGE_SIDE`.
+    detect_side : int, optional
+        Longest side of the detector input. Default is `DETECT_IMAGE_SIDE`.
+
+    Returns
+    -------
+    PreparedImage
+        The working image and the detector input.
+    """
+    image = load_image(source, max_side)
+    return PreparedImage(image, resize_to_fit(image, detect_side))
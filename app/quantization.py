@@ -0,0 +1,121 @@
+import glob
+import os
+
+import cv2
+import onnxruntime as ort
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    CalibrationMethod,
+    QuantFormat,
+    QuantType,
+    quantize_dynamic,
+    quantize_static,
+)
+
+from .detectors import DETECTOR_IMAGE_SIZE, make_batch
+
+# Images the static quantization observes to pick the activation ranges.
+CALIBRATION_IMAGES = os.getenv(
+    "DETECTOR_CALIBRATION_IMAGES", os.path.join("fake_generated_data", "images", "train", "*.png")
+)
+CALIBRATION_SIZE = int(os.getenv("DETECTOR_CALIBRATION_SIZE", "100"))
+
+
+def quantized_path(model_path, quantization):
+    """
+    Return where the INT8 version of an ONNX model is written, next to it.
+    """
+    return f"{os.path.splitext(model_path)[0]}_int8_{quantization}.onnx"
+
+
+class LetterboxCalibrationReader(CalibrationDataReader):
+    """
+    Feed calibration images to the ONNX Runtime quantizer, preprocessed like at inference.
+
+    Parameters
+    ----------
+    image_paths : list of str
+        The calibration images.
+    input_name : str
+        Name of the model input.
+    imgsz : int, optional
+        Side of the square model input. Default is `DETECTOR_IMAGE_SIZE`.
+    """
+
+    def __init__(self, image_paths, input_name, imgsz=DETECTOR_IMAGE_SIZE):
+        self.image_paths = iter(image_paths)
+        self.input_name = input_name
+        self.imgsz = imgsz
+
+    def get_next(self):
+        image_path = next(self.image_paths, None)
+        if image_path is None:
+            return None
+        batch, _ = make_batch([cv2.imread(image_path)], self.imgsz)
+        return {self.input_name: batch}
+
+
+def quantize_detector(
+    model_path,
+    quantization="static",
+    output_path=None,
+    calibration_images=CALIBRATION_IMAGES,
+    calibration_size=CALIBRATION_SIZE,
+):
+    """
+    Quantize the ONNX export of the detector to INT8.
+
+    Parameters
+    ----------
+    model_path : str
+        Path to the FP32 `.onnx` model written by `detectors.export_detector`.
+    quantization : str, optional
+        "dynamic" quantizes the weights only, activations are quantized on the
+        fly at every call. "static" also quantizes the activations, with ranges
+        calibrated on `calibration_images`. Default is "static".
+    output_path : str, optional
+        Path of the quantized model. Default is `quantized_path(model_path, quantization)`.
+    calibration_images : str, optional
+        Glob of the calibration images. Default is `CALIBRATION_IMAGES`.
+    calibration_size : int, optional
+        Maximum number of calibration images. Default is `CALIBRATION_SIZE`.
+
+    Returns
+    -------
+    str
+        Path of the quantized model.
+
+    Raises
+    ------
+    FileNotFoundError
+        If static quantization finds no calibration image.
+
+    Notes
+    -----
+    Static quantization writes QDQ nodes with per-channel weights, the format
+    ONNX Runtime runs with INT8 kernels on CPU. Check the accuracy loss with
+    `benchmarks/quantization_report.py` before serving a quantized model.
+    """
+    output_path = output_path or quantized_path(model_path, quantization)
+    if quantization == "dynamic":
+        quantize_dynamic(model_path, output_path, weight_type=QuantType.QUInt8)
+        return output_path
+
+    image_paths = sorted(glob.glob(calibration_images))[:calibration_size]
+    if not image_paths:
+        raise FileNotFoundError(f"No calibration images match {calibration_images}")
+    input_name = ort.InferenceSession(
+        model_path, providers=["CPUExecutionProvider"]
+    ).get_inputs()[0].name
+
+    quantize_static(
+        model_path,
+        output_path,
+        LetterboxCalibrationReader(image_paths, input_name),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        calibrate_method=CalibrationMethod.MinMax,
+    )
+    return output_path
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
-from datetime import date
+from datetime import date, datetime
+from typing import Literal
 
 
 class Identity(BaseModel):
@@ -19,3 +20,49 @@ class IdentityCardRequest(Identity):
 class IdentityCardResponse(Identity):
     id: int
     created_at: date
+
+
+class InferenceResultResponse(BaseModel):
+    identity_number: str
+    surname: str
+    name: str
+    birth_date: str  # ISO date when it is valid, otherwise the text as read
+    # Why the identity number or the birth date fails validation, by field
+    field_errors: dict[str, str] = {}
+
+
+class IdentityCardPage(BaseModel):
+    items: list[IdentityCardResponse]
+    next_cursor: int | None = None  # pass as `cursor` to get the next page, None on the last page
+
+
+class BulkIdentityCardRequest(BaseModel):
+    cards: list[IdentityCardRequest] = Field(min_length=1)
+    # What to do with a card whose identity number is already saved
+    on_conflict: Literal["skip", "update", "report"] = "skip"
+
+
+class BulkSaveOutcome(BaseModel):
+    index: int  # position of the card in the request
+    identity_number: str
+    status: Literal["inserted", "updated", "skipped", "conflict", "duplicate", "invalid"]
+    id: int | None = None  # id of the saved or conflicting row, when known
+    field_errors: dict[str, str] = {}  # invalid numeric fields, saved only if not rejected
+
+
+class BulkSaveResponse(BaseModel):
+    inserted: int
+    updated: int
+    skipped: int
+    conflicts: int
+    duplicates: int
+    invalid: int
+    results: list[BulkSaveOutcome]
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str  # queued, detecting, ocr, done or failed
+    result: dict | None = None
+    error: str | None = None
+    created_at: datetime
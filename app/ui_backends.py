@@ -0,0 +1,197 @@
+import os
+import logging
+import importlib.util
+
+import httpx
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Base URL of the FastAPI server, used when the UI runs in another process.
+FASTAPI_BASE_URL = os.getenv("FASTAPI_BASE_URL", "http://127.0.0.1:8000")
+# "inprocess" calls the API functions directly when the UI is mounted on the app,
+# "http" always goes through FASTAPI_BASE_URL.
+GRADIO_BACKEND = os.getenv("GRADIO_BACKEND", "inprocess")
+
+# Seconds to wait for a response. Inference on a cold model can take a while.
+HTTP_TIMEOUT = float(os.getenv("GRADIO_HTTP_TIMEOUT", "60"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("GRADIO_HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("GRADIO_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("GRADIO_HTTP_MAX_KEEPALIVE", "10"))
+# Seconds an idle connection is kept open for reuse.
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("GRADIO_HTTP_KEEPALIVE_EXPIRY", "30"))
+# HTTP/2 needs the optional `h2` package (pip install "httpx[http2]"), which is
+# not in requirements.txt, and an HTTPS server negotiating it. Off by default.
+HTTP2 = os.getenv("GRADIO_HTTP2", "0") == "1"
+
+
+class BackendError(Exception):
+    """Raised when the API rejects a UI action, with the HTTP status it maps to."""
+
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class HttpBackend:
+    """
+    Calls the FastAPI endpoints over HTTP, for a UI running in another process.
+
+    A single client is shared by every UI session, so connections are pooled
+    and kept alive between clicks instead of opened per request.
+
+    Parameters
+    ----------
+    base_url : str, optional
+        Base URL of the FastAPI server. Default is `FASTAPI_BASE_URL`.
+    """
+
+    def __init__(self, base_url=FASTAPI_BASE_URL):
+        self.base_url = base_url
+        http2 = HTTP2 and importlib.util.find_spec("h2") is not None
+        if HTTP2 and not http2:
+            logger.info("h2 is not installed, the Gradio client uses HTTP/1.1")
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        )
+
+    async def _request(self, method, url, **kwargs):
+        response = await self.client.request(method, url, **kwargs)
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise BackendError(e.response.status_code, e.response.text)
+        return response.json()
+
+    async def upload(self, file_path, filename, content_type):
+        with open(file_path, "rb") as f:
+            files = {"file": (filename, f, content_type)}
+            return await self._request("POST", "/identity_cards/save_file/", files=files)
+
+    async def extract(self, job_id):
+        return await self._request(
+            "GET", "/identity_cards/show_inference_results/", params={"job_id": job_id}
+        )
+
+    async def save(self, job_id):
+        return await self._request(
+            "POST", "/identity_cards/save_inference_results/", params={"job_id": job_id}
+        )
+
+    async def list_cards(self, **params):
+        params = {key: value for key, value in params.items() if value is not None}
+        return await self._request(
+            "GET", "/identity_cards/get_inference_results", params=params
+        )
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+class InProcessBackend:
+    """
+    Calls the API functions directly, for a UI mounted on the FastAPI app.
+
+    Skips the loopback HTTP round trip, the JSON encoding and the multipart
+    re-encoding of images that are already on the local disk. Errors are mapped
+    to the status codes the endpoints would return, so the UI shows the same
+    messages with both backends.
+
+    The API modules are imported on first use, so a standalone UI using
+    `HttpBackend` never loads the models or opens the database.
+    """
+
+    async def _call(self, coroutine):
+        from .crud import DuplicateIdentityCardError, UploadTooLargeError
+        from .jobs import JobNotFoundError
+        from .workers import PoolFullError
+
+        try:
+            return await coroutine
+        except HTTPException as e:
+            raise BackendError(e.status_code, e.detail)
+        except JobNotFoundError as e:
+            raise BackendError(404, str(e))
+        except UploadTooLargeError as e:
+            raise BackendError(413, str(e))
+        except DuplicateIdentityCardError as e:
+            raise BackendError(409, str(e))
+        except PoolFullError as e:
+            raise BackendError(503, str(e))
+        except ValueError as e:
+            raise BackendError(422, str(e))
+
+    async def upload(self, file_path, filename, content_type):
+        from .crud import create_upload_job
+
+        async def upload():
+            with open(file_path, "rb") as f:
+                file = UploadFile(f, size=os.path.getsize(file_path), filename=filename)
+                job_id, saved_path = await run_in_threadpool(create_upload_job, file)
+            return {"message": saved_path, "job_id": job_id}
+
+        return await self._call(upload())
+
+    async def extract(self, job_id):
+        from .crud import show_inference_result
+
+        return await self._call(show_inference_result(job_id))
+
+    async def save(self, job_id):
+        from .crud import async_save_inference_result
+        from .database import AsyncSessionLocal
+        from .schemas import IdentityCardResponse
+
+        async def save():
+            async with AsyncSessionLocal() as db:
+                identity_card = await async_save_inference_result(db, job_id)
+            return IdentityCardResponse.model_validate(
+                identity_card, from_attributes=True
+            ).model_dump(mode="json")
+
+        return await self._call(save())
+
+    async def list_cards(self, **params):
+        from .crud import async_list_identity_cards
+        from .database import AsyncSessionLocal
+        from .schemas import IdentityCardPage
+
+        async def list_cards():
+            async with AsyncSessionLocal() as db:
+                page = await async_list_identity_cards(db, **params)
+            return IdentityCardPage.model_validate(page, from_attributes=True).model_dump(
+                mode="json"
+            )
+
+        return await self._call(list_cards())
+
+    async def aclose(self):
+        pass
+
+
+def create_backend(mounted=False):
+    """
+    Choose how the UI reaches the API.
+
+    Parameters
+    ----------
+    mounted : bool, optional
+        True when the UI is mounted on the FastAPI app with `gr.mount_gradio_app`.
+
+    Returns
+    -------
+    InProcessBackend or HttpBackend
+        `InProcessBackend` when mounted, unless `GRADIO_BACKEND` is "http".
+    """
+    if mounted and GRADIO_BACKEND != "http":
+        return InProcessBackend()
+    return HttpBackend()
@@ -0,0 +1,140 @@
+import re
+from datetime import date
+
+DIGITS = "0123456789"
+# Fields with a fixed numeric format. The recognizer only decodes these characters for them.
+NUMERIC_ALLOWLISTS = {"birth_date": DIGITS + ".", "id_number": DIGITS}
+IDENTITY_NUMBER_LENGTH = 11
+# Oldest birth year accepted on a card, anything before is an OCR misread.
+MIN_BIRTH_YEAR = 1900
+# Year first as drawn by the dataset generator (1990.01.31), day first as
+# printed on real cards (31.01.1990). ISO dates come back from the API.
+BIRTH_DATE_PATTERNS = (
+    (re.compile(r"(\d{4})[.\-/]?(\d{2})[.\-/]?(\d{2})"), ("year", "month", "day")),
+    (re.compile(r"(\d{2})[.\-/]?(\d{2})[.\-/]?(\d{4})"), ("day", "month", "year")),
+)
+
+
+def identity_number_check_digits(first_nine):
+    """
+    Compute the two check digits of a Turkish identity number.
+
+    Parameters
+    ----------
+    first_nine : str
+        The first nine digits of the identity number.
+
+    Returns
+    -------
+    str
+        The 10th and 11th digits.
+
+    Notes
+    -----
+    The 10th digit is seven times the sum of the odd positions minus the sum of
+    the even positions, modulo 10. The 11th digit is the sum of the first ten
+    digits, modulo 10.
+    """
+    digits = [int(digit) for digit in first_nine]
+    tenth = (sum(digits[0::2]) * 7 - sum(digits[1::2])) % 10
+    eleventh = (sum(digits) + tenth) % 10
+    return f"{tenth}{eleventh}"
+
+
+def identity_number_error(identity_number):
+    """
+    Check a recognized identity number.
+
+    Parameters
+    ----------
+    identity_number : str
+        The identity number as read by OCR.
+
+    Returns
+    -------
+    str or None
+        Why the number is invalid, or None when it is valid.
+    """
+    if len(identity_number) != IDENTITY_NUMBER_LENGTH or not identity_number.isdigit():
+        return f"expected {IDENTITY_NUMBER_LENGTH} digits, got {identity_number!r}"
+    if identity_number[0] == "0":
+        return f"{identity_number} starts with 0"
+    if identity_number[9:] != identity_number_check_digits(identity_number[:9]):
+        return f"{identity_number} fails the check digits"
+    return None
+
+
+def parse_birth_date(text, today=None):
+    """
+    Parse a recognized birth date.
+
+    Parameters
+    ----------
+    text : str
+        The birth date as read by OCR, year first (YYYY.MM.DD) or day first
+        (DD.MM.YYYY). The dots may be missing or be dashes or slashes.
+    today : date, optional
+        Birth dates after this day are rejected. Default is `date.today()`.
+
+    Returns
+    -------
+    date or None
+        The birth date, or None when the text is not a plausible birth date.
+    """
+    today = today or date.today()
+    text = text.replace(" ", "")
+    for pattern, order in BIRTH_DATE_PATTERNS:
+        match = pattern.fullmatch(text)
+        if match is None:
+            continue
+        parts = dict(zip(order, map(int, match.groups())))
+        try:
+            birth_date = date(parts["year"], parts["month"], parts["day"])
+        except ValueError:
+            continue
+        if MIN_BIRTH_YEAR <= birth_date.year and birth_date <= today:
+            return birth_date
+    return None
+
+
+def birth_date_error(text):
+    """
+    Check a recognized birth date.
+
+    Parameters
+    ----------
+    text : str
+        The birth date as read by OCR.
+
+    Returns
+    -------
+    str or None
+        Why the date is invalid, or None when it is valid.
+    """
+    if parse_birth_date(text) is None:
+        return f"{text!r} is not a valid birth date"
+    return None
+
+
+def validate_identity_fields(identity_number, birth_date):
+    """
+    Check the numeric fields of a card, which have a fixed format.
+
+    Parameters
+    ----------
+    identity_number : str
+        The identity number as read by OCR.
+    birth_date : str
+        The birth date as read by OCR.
+
+    Returns
+    -------
+    dict
+        The error message of each invalid field, keyed by "identity_number" or
+        "birth_date". Empty when both fields are valid.
+    """
+    errors = {
+        "identity_number": identity_number_error(identity_number),
+        "birth_date": birth_date_error(birth_date),
+    }
+    return {field: error for field, error in errors.items() if error is not None}
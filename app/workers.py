@@ -0,0 +1,90 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "16"))
+INFERENCE_RETRY_AFTER = int(os.getenv("INFERENCE_RETRY_AFTER", "5"))
+
+
+class PoolFullError(Exception):
+    """Raised when the inference pool has no free worker or queue slot."""
+
+    def __init__(self, retry_after=INFERENCE_RETRY_AFTER):
+        super().__init__("Inference queue is full, retry later")
+        self.retry_after = retry_after
+
+
+class InferencePool:
+    """
+    Bounded thread pool that runs blocking inference off the event loop.
+
+    At most `max_workers` tasks run at once and at most `max_queue_size` more
+    wait for a worker. Submitting beyond that raises `PoolFullError` right
+    away instead of letting the backlog, and the latency, grow without limit.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Number of worker threads. Default is `INFERENCE_WORKERS`.
+    max_queue_size : int, optional
+        Number of tasks allowed to wait for a worker. Default is `INFERENCE_QUEUE_SIZE`.
+
+    Notes
+    -----
+    Threads rather than processes are used so the workers share the models in
+    `model_registry.registry`. PyTorch releases the GIL during inference.
+    """
+
+    def __init__(self, max_workers=INFERENCE_WORKERS, max_queue_size=INFERENCE_QUEUE_SIZE):
+        self.max_workers = max(1, max_workers)
+        self.max_queue_size = max(0, max_queue_size)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="inference"
+        )
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue_size)
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Schedule `fn(*args, **kwargs)` on the pool.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Future resolved with the return value of `fn`.
+
+        Raises
+        ------
+        PoolFullError
+            If every worker is busy and the queue is full.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise PoolFullError()
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Run `fn(*args, **kwargs)` on the pool and await its result.
+
+        Raises
+        ------
+        PoolFullError
+            If every worker is busy and the queue is full.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def shutdown(self):
+        """
+        Stop accepting tasks and cancel the ones still waiting for a worker.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+inference_pool = InferencePool()
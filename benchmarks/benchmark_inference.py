@@ -0,0 +1,243 @@
+"""
+End-to-end benchmark of the inference pipeline on the synthetic dataset.
+
+Runs every stage of `app/inference.py` over the images in `fake_generated_data/images`
+(train and val) and reports p50/p95/p99 latency per stage, cards per second, model
+load time and peak RSS. The report is printed and written as JSON so runs can be
+compared across commits.
+
+Stages, in the order the API runs them:
+- `preprocess`: decoding the image upright at the working resolution and
+  downscaling the detector input (`prepare_image`).
+- `detect_image`: YOLO forward pass on the downscaled detector input.
+- `crop_fields`: mapping the boxes back and slicing the crops out of the working image.
+- `save_crops`: writing the crops to disk with `write_crops`.
+- `apply_ocr`: EasyOCR over the crops on disk (file based pipeline).
+- `recognize_crops`: EasyOCR recognition of the in-memory crops, without text detection.
+- `extract_inference`: the full in-memory pipeline used by the API.
+
+Usage (from the repository root):
+
+    python -m benchmarks.benchmark_inference --output bench.json
+    python -m benchmarks.benchmark_inference --baseline bench.json --tolerance 0.1
+
+With `--baseline`, the script exits with status 1 when the p95 latency of any stage
+is more than `tolerance` slower than in the baseline report.
+"""
+
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.inference import (
+    apply_ocr,
+    crop_fields,
+    detect_image,
+    extract_inference,
+    get_detections,
+    recognize_crops,
+    write_crops,
+)
+from app.model_registry import registry
+from app.preprocessing import prepare_image
+
+IMAGE_GLOB = os.path.join("fake_generated_data", "images", "*", "*.png")
+
+
+def peak_rss_mb():
+    """
+    Return the peak resident set size of the process in MiB.
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        import psutil
+
+        return psutil.Process().memory_info().peak_wset / 2**20
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB on Linux
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def git_commit():
+    """
+    Return the current git commit hash, or None outside a git checkout.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(timings):
+    """
+    Summarize stage latencies.
+
+    Parameters
+    ----------
+    timings : list of float
+        Latencies in seconds.
+
+    Returns
+    -------
+    dict
+        Count, mean and p50/p95/p99 latencies in milliseconds.
+    """
+    latencies = np.asarray(timings) * 1000
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "count": len(timings),
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+    }
+
+
+def timed(timings, stage, fn, *args, **kwargs):
+    """
+    Call `fn(*args, **kwargs)` and append its latency to `timings[stage]`.
+    """
+    start = time.perf_counter()
+    output = fn(*args, **kwargs)
+    timings.setdefault(stage, []).append(time.perf_counter() - start)
+    return output
+
+
+def run_benchmark(image_paths, warmup=3):
+    """
+    Benchmark every pipeline stage over the given images.
+
+    Parameters
+    ----------
+    image_paths : list of str
+        Images to process.
+    warmup : int, optional
+        Number of untimed end-to-end runs before measuring. Default is 3.
+
+    Returns
+    -------
+    dict
+        The benchmark report.
+    """
+    start = time.perf_counter()
+    model = registry.get_model()
+    detector_load = time.perf_counter() - start
+    start = time.perf_counter()
+    reader = registry.get_reader()
+    reader_load = time.perf_counter() - start
+
+    for image_path in image_paths[:warmup]:
+        extract_inference(image_path)
+
+    timings = {}
+    with tempfile.TemporaryDirectory() as crop_dir:
+        for image_path in image_paths:
+            prepared = timed(timings, "preprocess", prepare_image, image_path)
+            results = timed(
+                timings, "detect_image", detect_image, prepared.detect_image, model
+            )
+            crops = timed(
+                timings,
+                "crop_fields",
+                lambda: crop_fields(
+                    prepared.image,
+                    prepared.to_image_coordinates(get_detections(results[0])),
+                    model.names,
+                ),
+            )
+            timed(timings, "save_crops", write_crops, crops, crop_dir)
+            timed(timings, "apply_ocr", apply_ocr, crop_dir, reader=reader)
+            timed(timings, "recognize_crops", recognize_crops, crops, reader)
+
+    for image_path in image_paths:
+        timed(timings, "extract_inference", extract_inference, image_path)
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "images": len(image_paths),
+        "weights_version": registry.weights_version,
+        "model_load_seconds": {"detector": detector_load, "reader": reader_load},
+        "cards_per_second": len(image_paths) / sum(timings["extract_inference"]),
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {stage: summarize(values) for stage, values in timings.items()},
+    }
+
+
+def find_regressions(report, baseline, tolerance):
+    """
+    List the stages whose p95 latency regressed beyond `tolerance` against a baseline.
+
+    Returns
+    -------
+    list of str
+        One message per regressed stage.
+    """
+    regressions = []
+    for stage, stats in report["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if previous and stats["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{stage}: p95 {stats['p95_ms']:.1f} ms vs {previous['p95_ms']:.1f} ms"
+            )
+    return regressions
+
+
+def print_report(report):
+    print(f"Images: {report['images']}  Commit: {report['commit']}")
+    print(
+        f"Model load: detector {report['model_load_seconds']['detector']:.2f} s, "
+        f"reader {report['model_load_seconds']['reader']:.2f} s"
+    )
+    print(f"{'stage':<20}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, stats in report["stages"].items():
+        print(
+            f"{stage:<20}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}"
+        )
+    print(f"Cards per second: {report['cards_per_second']:.2f}")
+    print(f"Peak RSS: {report['peak_rss_mb']:.0f} MiB")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", default=IMAGE_GLOB, help="Glob of images to process.")
+    parser.add_argument("--limit", type=int, default=None, help="Process at most N images.")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed warm-up runs.")
+    parser.add_argument("--output", default="bench_output.json", help="JSON report path.")
+    parser.add_argument("--baseline", default=None, help="JSON report to compare against.")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.1, help="Allowed p95 slowdown ratio."
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    image_paths = sorted(glob.glob(args.images))[: args.limit]
+    if not image_paths:
+        sys.exit(f"No images match {args.images}")
+
+    report = run_benchmark(image_paths, warmup=args.warmup)
+    print_report(report)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
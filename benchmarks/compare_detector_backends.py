@@ -0,0 +1,176 @@
+"""
+Check an exported detector backend against the PyTorch detector and compare their speed.
+
+Runs the ultralytics checkpoint and its ONNX Runtime or OpenVINO export (see
+`app/detectors.py`) over the validation images, then reports for every field
+whether both backends detect it and the IoU of the boxes kept by `crop_fields`
+(the highest scoring box of each field), along with the detection latency of
+each backend and the speedup.
+
+Usage (from the repository root):
+
+    python -m benchmarks.compare_detector_backends --backend onnx --threads 4
+    python -m benchmarks.compare_detector_backends --backend openvino --output openvino.json
+
+The script exits with status 1 when a field is detected by only one backend or
+when the IoU of a field falls below `--min-iou`.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from app.detectors import DETECTOR_THREADS, load_detector
+from app.inference import get_detections
+from app.model_registry import WEIGHTS_PATH
+from benchmarks.benchmark_inference import git_commit, summarize
+
+IMAGE_GLOB = os.path.join("fake_generated_data", "images", "val", "*.png")
+
+
+def best_boxes(detections):
+    """
+    Return the highest scoring box of each class, keyed by class id.
+    """
+    boxes = {}
+    for index in np.argsort(-detections["scores"]):
+        boxes.setdefault(int(detections["classes"][index]), detections["boxes"][index])
+    return boxes
+
+
+def box_iou(box, other):
+    """
+    Return the intersection over union of two (x1, y1, x2, y2) boxes.
+    """
+    width = min(box[2], other[2]) - max(box[0], other[0])
+    height = min(box[3], other[3]) - max(box[1], other[1])
+    intersection = max(width, 0) * max(height, 0)
+    union = (
+        (box[2] - box[0]) * (box[3] - box[1])
+        + (other[2] - other[0]) * (other[3] - other[1])
+        - intersection
+    )
+    return intersection / union if union > 0 else 0.0
+
+
+def compare_backends(image_paths, weights_path, backend, threads, min_iou, warmup=3):
+    """
+    Detect every image with both backends and compare the kept boxes.
+
+    Parameters
+    ----------
+    image_paths : list of str
+        Images to process.
+    weights_path : str
+        Path to the `.pt` checkpoint.
+    backend : str
+        Exported backend to check, "onnx" or "openvino".
+    threads : int
+        Intra-op threads of the exported backend, 0 lets the runtime decide.
+    min_iou : float
+        IoU below which a field counts as a mismatch.
+    warmup : int, optional
+        Untimed runs per backend before measuring. Default is 3.
+
+    Returns
+    -------
+    dict
+        The comparison report.
+    """
+    models = {
+        "torch": load_detector(weights_path, "torch"),
+        backend: load_detector(weights_path, backend, threads),
+    }
+    images = [cv2.imread(image_path) for image_path in image_paths]
+    for model in models.values():
+        for image in images[:warmup]:
+            model(image)
+
+    timings = {name: [] for name in models}
+    ious = []
+    mismatches = []
+    for image_path, image in zip(image_paths, images):
+        boxes = {}
+        for name, model in models.items():
+            start = time.perf_counter()
+            result = model(image)[0]
+            timings[name].append(time.perf_counter() - start)
+            boxes[name] = best_boxes(get_detections(result))
+
+        reference, exported = boxes["torch"], boxes[backend]
+        for class_id in sorted(reference.keys() | exported.keys()):
+            field = models["torch"].names[class_id]
+            if class_id not in reference or class_id not in exported:
+                missing = "torch" if class_id not in reference else backend
+                mismatches.append(f"{image_path}: {field} not detected by {missing}")
+                continue
+            iou = box_iou(reference[class_id], exported[class_id])
+            ious.append(iou)
+            if iou < min_iou:
+                mismatches.append(f"{image_path}: {field} IoU {iou:.3f}")
+
+    latencies = {name: summarize(values) for name, values in timings.items()}
+    return {
+        "commit": git_commit(),
+        "images": len(image_paths),
+        "backend": backend,
+        "threads": threads,
+        "latency": latencies,
+        "speedup_p50": latencies["torch"]["p50_ms"] / latencies[backend]["p50_ms"],
+        "fields_compared": len(ious),
+        "mean_iou": float(np.mean(ious)) if ious else None,
+        "min_iou": float(np.min(ious)) if ious else None,
+        "mismatches": mismatches,
+    }
+
+
+def print_report(report):
+    print(f"Images: {report['images']}  Backend: {report['backend']}  Threads: {report['threads']}")
+    print(f"{'backend':<12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, stats in report["latency"].items():
+        print(f"{name:<12}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+    print(f"Speedup (p50): {report['speedup_p50']:.2f}x")
+    if report["fields_compared"]:
+        print(
+            f"Fields compared: {report['fields_compared']}  "
+            f"IoU mean {report['mean_iou']:.4f}, min {report['min_iou']:.4f}"
+        )
+    for mismatch in report["mismatches"]:
+        print(f"MISMATCH {mismatch}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--weights", default=WEIGHTS_PATH, help="Path to the .pt checkpoint.")
+    parser.add_argument("--backend", choices=("onnx", "openvino"), default="onnx")
+    parser.add_argument(
+        "--threads", type=int, default=DETECTOR_THREADS, help="Intra-op threads, 0 for the runtime default."
+    )
+    parser.add_argument("--images", default=IMAGE_GLOB, help="Glob of images to process.")
+    parser.add_argument("--min-iou", type=float, default=0.9, help="Minimum IoU of a field.")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed warm-up runs per backend.")
+    parser.add_argument("--output", default=None, help="Optional JSON report path.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    image_paths = sorted(glob.glob(args.images))
+    if not image_paths:
+        sys.exit(f"No images match {args.images}")
+
+    report = compare_backends(
+        image_paths, args.weights, args.backend, args.threads, args.min_iou, args.warmup
+    )
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if report["mismatches"]:
+        sys.exit(1)
@@ -0,0 +1,215 @@
+"""
+Accuracy versus speed report of the INT8 quantized detector and recognizer.
+
+Every configuration runs in its own process, so peak memory is measured per
+configuration. For each one the report gives:
+- mAP50-95 and mAP50 of the detector on `dataset.yaml`, through `validate_model`.
+- Field-level OCR accuracy of the full in-memory pipeline on freshly generated
+  synthetic cards whose text is known (exact match per field).
+- Latency per card (p50/p95/p99), model load time and peak RSS.
+
+Configurations (detector backend, detector quantization, recognizer):
+- `torch-fp32`: the PyTorch checkpoint with the FP32 recognizer (baseline).
+- `onnx-fp32`: the FP32 ONNX export with the FP32 recognizer.
+- `onnx-int8-dynamic`: dynamically quantized ONNX detector, INT8 recognizer.
+- `onnx-int8-static`: statically quantized ONNX detector calibrated on
+  `fake_generated_data`, INT8 recognizer.
+- `openvino-int8`: NNCF quantized OpenVINO detector, INT8 recognizer.
+
+Usage (from the repository root):
+
+    python -m benchmarks.quantization_report --cards 200 --output quantization.json
+    python -m benchmarks.quantization_report --configs torch-fp32 onnx-int8-static
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import easyocr
+import numpy as np
+from ultralytics import YOLO
+
+from app.detectors import DETECTOR_THREADS, load_detector, resolve_detector_path
+from app.inference import crop_fields, get_detections, recognize_crops, text_labels, validate_model
+from app.model_registry import OCR_LANGUAGES, WEIGHTS_PATH
+from benchmarks.benchmark_inference import git_commit, peak_rss_mb, summarize
+from fake_data_generation.faker_utils import create_fake_infos
+from fake_data_generation.generate_dataset import sample_seed
+from fake_data_generation.image_utils import draw_text_fields, initialize_template
+
+CONFIGS = {
+    "torch-fp32": ("torch", "none", False),
+    "onnx-fp32": ("onnx", "none", False),
+    "onnx-int8-dynamic": ("onnx", "dynamic", True),
+    "onnx-int8-static": ("onnx", "static", True),
+    "openvino-int8": ("openvino", "static", True),
+}
+DEFAULT_CONFIGS = ("torch-fp32", "onnx-fp32", "onnx-int8-dynamic", "onnx-int8-static")
+
+
+def make_synthetic_cards(count, seed):
+    """
+    Draw identity cards with known text, like the dataset generator does.
+
+    Parameters
+    ----------
+    count : int
+        Number of cards.
+    seed : int
+        Seed of the fake information. Use one that differs from the training data.
+
+    Returns
+    -------
+    list of tuple
+        (BGR image, fake information dict) pairs. The dict keys are the field labels.
+    """
+    seeds = [sample_seed(seed, index) for index in range(count)]
+    cards = []
+    for fake_info_dict in create_fake_infos(seeds):
+        template_image, draw, fill, font, align = initialize_template()
+        draw_text_fields(draw, fill, font, align, fake_info_dict)
+        image = cv2.cvtColor(np.asarray(template_image), cv2.COLOR_RGB2BGR)
+        cards.append((image, fake_info_dict))
+    return cards
+
+
+def run_config(name, weights_path, cards, data, threads):
+    """
+    Measure one configuration.
+
+    Parameters
+    ----------
+    name : str
+        A key of `CONFIGS`.
+    weights_path : str
+        Path to the `.pt` checkpoint.
+    cards : list of tuple
+        Synthetic cards, as returned by `make_synthetic_cards`.
+    data : str
+        Dataset YAML used for mAP.
+    threads : int
+        Intra-op threads of the exported detectors.
+
+    Returns
+    -------
+    dict
+        The measurements of the configuration.
+    """
+    backend, quantization, ocr_quantize = CONFIGS[name]
+
+    start = time.perf_counter()
+    detector = load_detector(weights_path, backend, threads, quantization)
+    reader = easyocr.Reader(OCR_LANGUAGES, gpu=False, quantize=ocr_quantize)
+    load_seconds = time.perf_counter() - start
+
+    # Warm up the runtimes before timing
+    for image, _ in cards[:3]:
+        detections = get_detections(detector(image)[0])
+        recognize_crops(crop_fields(image, detections, detector.names), reader)
+
+    latencies = []
+    correct = dict.fromkeys(text_labels, 0)
+    for image, fake_info_dict in cards:
+        start = time.perf_counter()
+        result = detector(image)[0]
+        crops = crop_fields(result.orig_img, get_detections(result), detector.names)
+        extracted_texts = recognize_crops(crops, reader)
+        latencies.append(time.perf_counter() - start)
+        for label in text_labels:
+            correct[label] += extracted_texts[label].strip() == fake_info_dict[label]
+
+    model_path = resolve_detector_path(weights_path, backend, quantization)
+    metrics = validate_model(YOLO(model_path, task="detect"), data)
+
+    field_accuracy = {label: correct[label] / len(cards) for label in text_labels}
+    return {
+        "config": name,
+        "detector": {"backend": backend, "quantization": quantization, "path": model_path},
+        "recognizer_int8": ocr_quantize,
+        "map50_95": float(metrics.box.map),
+        "map50": float(metrics.box.map50),
+        "field_accuracy": field_accuracy,
+        "card_accuracy": float(np.mean(list(field_accuracy.values()))),
+        "latency": summarize(latencies),
+        "load_seconds": load_seconds,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_in_subprocess(name, args):
+    """
+    Run `run_config` for one configuration in a fresh Python process.
+    """
+    with tempfile.TemporaryDirectory() as output_dir:
+        output = os.path.join(output_dir, f"{name}.json")
+        command = [sys.executable, "-m", "benchmarks.quantization_report", "--single", name]
+        command += ["--weights", args.weights, "--data", args.data, "--output", output]
+        command += ["--cards", str(args.cards), "--seed", str(args.seed), "--threads", str(args.threads)]
+        subprocess.run(command, check=True)
+        with open(output) as f:
+            return json.load(f)
+
+
+def print_report(results, baseline):
+    reference = results.get(baseline)
+    print(
+        f"{'config':<20}{'mAP50-95':>10}{'mAP50':>8}{'fields':>8}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'RSS MiB':>9}{'speedup':>9}"
+    )
+    for name, result in results.items():
+        speedup = (
+            reference["latency"]["p50_ms"] / result["latency"]["p50_ms"] if reference else float("nan")
+        )
+        print(
+            f"{name:<20}{result['map50_95']:>10.4f}{result['map50']:>8.4f}"
+            f"{result['card_accuracy']:>8.1%}{result['latency']['p50_ms']:>9.1f}"
+            f"{result['latency']['p95_ms']:>9.1f}{result['peak_rss_mb']:>9.0f}{speedup:>8.2f}x"
+        )
+    print("Field accuracy:")
+    for name, result in results.items():
+        fields = ", ".join(f"{label} {value:.1%}" for label, value in result["field_accuracy"].items())
+        print(f"  {name}: {fields}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--weights", default=WEIGHTS_PATH, help="Path to the .pt checkpoint.")
+    parser.add_argument("--data", default="dataset.yaml", help="Dataset YAML used for mAP.")
+    parser.add_argument("--cards", type=int, default=200, help="Synthetic cards used for OCR accuracy.")
+    parser.add_argument("--seed", type=int, default=1_000_003, help="Seed of the synthetic cards.")
+    parser.add_argument(
+        "--threads", type=int, default=DETECTOR_THREADS, help="Intra-op threads, 0 for the runtime default."
+    )
+    parser.add_argument(
+        "--configs", nargs="+", choices=sorted(CONFIGS), default=list(DEFAULT_CONFIGS)
+    )
+    parser.add_argument("--baseline", default="torch-fp32", help="Configuration speedups are relative to.")
+    parser.add_argument("--output", default="quantization_report.json", help="JSON report path.")
+    parser.add_argument("--single", choices=sorted(CONFIGS), default=None, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.single:
+        cards = make_synthetic_cards(args.cards, args.seed)
+        result = run_config(args.single, args.weights, cards, args.data, args.threads)
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        sys.exit()
+
+    results = {name: run_in_subprocess(name, args) for name in args.configs}
+    print_report(results, args.baseline)
+    with open(args.output, "w") as f:
+        json.dump(
+            {"commit": git_commit(), "cards": args.cards, "seed": args.seed, "results": results},
+            f,
+            indent=2,
+        )
@@ -0,0 +1,184 @@
+import cv2
+import numpy as np
+
+# Ranges are sampled uniformly per image. Set a probability to 0 to disable a transform.
+DEFAULT_AUGMENTATION_CONFIG = {
+    "rotation_degrees": 5.0,  # maximum absolute rotation
+    "scale": (0.9, 1.05),  # zoom range around the image center
+    "perspective": 0.04,  # maximum corner displacement, as a fraction of the image size
+    "brightness": 0.15,  # maximum brightness shift, as a fraction of 255
+    "contrast": 0.2,  # maximum relative contrast change
+    "glare_probability": 0.3,
+    "glare_strength": (0.2, 0.5),  # peak intensity of the glare spot, as a fraction of 255
+    "blur_probability": 0.3,
+    "blur_sigma": (0.5, 1.5),
+    "noise_probability": 0.5,
+    "noise_std": (2.0, 8.0),
+}
+
+
+def random_homography(rng, width, height, config):
+    """
+    Sample a geometric transform combining rotation, scaling and perspective.
+
+    Parameters
+    ----------
+    rng : np.random.Generator
+        Random generator of the sample.
+    width : int
+        Image width in pixels.
+    height : int
+        Image height in pixels.
+    config : dict
+        Augmentation settings, see `DEFAULT_AUGMENTATION_CONFIG`.
+
+    Returns
+    -------
+    np.ndarray
+        (3, 3) homography mapping source pixel coordinates to augmented ones.
+    """
+    corners = np.array([[0, 0], [width, 0], [width, height], [0, height]], dtype=np.float32)
+    jitter = rng.uniform(-1, 1, size=(4, 2)) * config["perspective"] * np.array([width, height])
+    perspective = cv2.getPerspectiveTransform(corners, (corners + jitter).astype(np.float32))
+
+    angle = rng.uniform(-config["rotation_degrees"], config["rotation_degrees"])
+    scale = rng.uniform(*config["scale"])
+    rotation = np.vstack(
+        [cv2.getRotationMatrix2D((width / 2, height / 2), angle, scale), [0, 0, 1]]
+    )
+    return rotation @ perspective
+
+
+def transform_boxes(boxes, homography, width, height):
+    """
+    Map (x1, y1, x2, y2) boxes through a homography.
+
+    Each box becomes the axis-aligned box enclosing its four transformed corners,
+    clipped to the image.
+
+    Parameters
+    ----------
+    boxes : np.ndarray
+        (N, 4) boxes in (x1, y1, x2, y2) pixel format.
+    homography : np.ndarray
+        (3, 3) transform, as returned by `random_homography`.
+    width : int
+        Image width in pixels.
+    height : int
+        Image height in pixels.
+
+    Returns
+    -------
+    np.ndarray
+        (N, 4) transformed boxes in (x1, y1, x2, y2) pixel format.
+    """
+    x1, y1, x2, y2 = np.asarray(boxes, dtype=np.float64).T
+    # (N, 4 corners, 3) homogeneous coordinates
+    corners = np.stack(
+        [
+            np.stack([x1, y1, np.ones_like(x1)], axis=-1),
+            np.stack([x2, y1, np.ones_like(x1)], axis=-1),
+            np.stack([x2, y2, np.ones_like(x1)], axis=-1),
+            np.stack([x1, y2, np.ones_like(x1)], axis=-1),
+        ],
+        axis=1,
+    )
+    projected = corners @ homography.T
+    projected = projected[..., :2] / projected[..., 2:]
+
+    transformed = np.concatenate([projected.min(axis=1), projected.max(axis=1)], axis=1)
+    transformed[:, [0, 2]] = transformed[:, [0, 2]].clip(0, width)
+    transformed[:, [1, 3]] = transformed[:, [1, 3]].clip(0, height)
+    return transformed.astype(np.float32)
+
+
+def adjust_lighting(image, rng, config):
+    """
+    Apply random brightness, contrast and an optional glare spot.
+
+    Parameters
+    ----------
+    image : np.ndarray
+        (H, W, C) float32 image in the 0-255 range, modified in place.
+    rng : np.random.Generator
+        Random generator of the sample.
+    config : dict
+        Augmentation settings, see `DEFAULT_AUGMENTATION_CONFIG`.
+
+    Returns
+    -------
+    np.ndarray
+        The adjusted image.
+    """
+    contrast = 1 + rng.uniform(-config["contrast"], config["contrast"])
+    brightness = rng.uniform(-config["brightness"], config["brightness"]) * 255
+    mean = image.mean()
+    image -= mean
+    image *= contrast
+    image += mean + brightness
+
+    if rng.random() < config["glare_probability"]:
+        height, width = image.shape[:2]
+        center_x, center_y = rng.uniform(0, width), rng.uniform(0, height)
+        radius = rng.uniform(0.15, 0.4) * max(width, height)
+        ys, xs = np.ogrid[:height, :width]
+        spot = np.exp(-((xs - center_x) ** 2 + (ys - center_y) ** 2) / (2 * radius**2))
+        if image.ndim == 3:
+            spot = spot[..., None]
+        image += rng.uniform(*config["glare_strength"]) * 255 * spot
+
+    return image
+
+
+def augment(image, labels, boxes, rng, config=None):
+    """
+    Apply geometric and photometric augmentations to an image and its boxes together.
+
+    Parameters
+    ----------
+    image : np.ndarray
+        (H, W, C) uint8 image.
+    labels : np.ndarray
+        (N,) integer class labels.
+    boxes : np.ndarray
+        (N, 4) boxes in (x1, y1, x2, y2) pixel format.
+    rng : np.random.Generator
+        Random generator of the sample, which makes the augmentation reproducible.
+    config : dict, optional
+        Augmentation settings overriding `DEFAULT_AUGMENTATION_CONFIG`.
+
+    Returns
+    -------
+    tuple
+        A tuple containing the augmented uint8 image (same size as the input), the
+        labels and the transformed boxes.
+
+    Notes
+    -----
+    - Boxes go through the same homography as the image, so labels stay aligned
+      with the warped text.
+    - Boxes pushed (almost) entirely out of the image are dropped together with
+      their labels.
+    """
+    config = {**DEFAULT_AUGMENTATION_CONFIG, **(config or {})}
+    height, width = image.shape[:2]
+
+    homography = random_homography(rng, width, height, config)
+    image = cv2.warpPerspective(
+        image, homography, (width, height), borderMode=cv2.BORDER_REPLICATE
+    )
+    boxes = transform_boxes(boxes, homography, width, height)
+    visible = (boxes[:, 2] - boxes[:, 0] >= 1) & (boxes[:, 3] - boxes[:, 1] >= 1)
+    labels, boxes = np.asarray(labels)[visible], boxes[visible]
+
+    image = adjust_lighting(image.astype(np.float32), rng, config)
+
+    if rng.random() < config["blur_probability"]:
+        image = cv2.GaussianBlur(image, (0, 0), rng.uniform(*config["blur_sigma"]))
+
+    if rng.random() < config["noise_probability"]:
+        image += rng.normal(0, rng.uniform(*config["noise_std"]), size=image.shape).astype(
+            np.float32
+        )
+
+    return np.clip(image, 0, 255).astype(np.uint8), labels, boxes
@@ -64,4 +64,43 @@ def normalize_yolo_bbox_coordinates(img_size, yolo_box):
     return yolo_box
 
 
+def normalize_yolo_bboxes(img_size, yolo_boxes):
+    """
+    Normalize many YOLO bounding boxes to be between 0 and 1 in one NumPy operation.
+
+    Parameters
+    ----------
+    img_size : array-like
+        Either a single (image_width, image_height) pair shared by all boxes, or an
+        (N, 2) array with the size of the image of each box.
+    yolo_boxes : array-like
+        (N, 4) boxes in YOLO format as [x_center, y_center, width, height] in pixel units.
+
+    Returns
+    -------
+    np.ndarray
+        (N, 4) float32 array of normalized boxes.
+    """
+    scale = np.tile(np.asarray(img_size, dtype=np.float32), 2)  # (w, h, w, h) per box
+    return np.asarray(yolo_boxes, dtype=np.float32) / scale
+
 
+def xyxy2yolo(img_size, boxes):
+    """
+    Convert many (x1, y1, x2, y2) pixel boxes to normalized YOLO boxes at once.
+
+    Parameters
+    ----------
+    img_size : array-like
+        Either a single (image_width, image_height) pair, or an (N, 2) array with
+        the size of the image of each box (e.g. for a whole shard).
+    boxes : array-like
+        (N, 4) boxes in (x1, y1, x2, y2) pixel format.
+
+    Returns
+    -------
+    np.ndarray
+        (N, 4) float32 array of normalized [x_center, y_center, width, height] boxes.
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    return normalize_yolo_bboxes(img_size, xyxy2xywh(boxes))
@@ -1,36 +1,109 @@
 from faker import Faker
 
+# The check digits come from the API validators, so generated cards always pass them.
+from app.validators import identity_number_check_digits
 
-def create_fake_info():
+_fake = None
+
+
+def get_faker():
+    """
+    Return the Faker instance shared by every sample of the process.
+
+    Returns
+    -------
+    Faker
+        A Faker instance, created on first use.
+    """
+    global _fake
+    if _fake is None:
+        _fake = Faker()
+    return _fake
+
+
+def fake_identity_number(fake):
+    """
+    Generate a Turkish identity number with valid check digits.
+
+    Parameters
+    ----------
+    fake : Faker
+        The Faker instance to draw the digits from.
+
+    Returns
+    -------
+    str
+        11 digits, the first one non-zero, the last two being the check digits.
+    """
+    first_nine = fake.numerify("%########")
+    return first_nine + identity_number_check_digits(first_nine)
+
+
+def create_fake_info(fake=None):
     """
     Generate a dictionary of fake identity information for testing purposes.
 
     This function uses the Faker library to produce synthetic personal data 
     resembling identity card fields. The values include a randomly generated 
-    Turkish-style ID number, surname, first name, and a birth date formatted 
+    Turkish-style ID number with valid check digits, surname, first name, and a birth date formatted 
     with periods instead of hyphens.
 
+    Parameters
+    ----------
+    fake : Faker, optional
+        The Faker instance to draw values from, e.g. a seeded one for
+        reproducible output. Defaults to the shared instance from `get_faker`.
+
     Returns
     -------
     dict
         A dictionary containing the following keys:
         - 'id_number' : str
             A string of 11 digits representing a fake national ID number.
+            Its check digits are valid, so it passes the API validation.
         - 'surname' : str
-            A fake surname extracted from a randomly generated full name.
+            A fake surname.
         - 'name' : str
-            A fake first name extracted from a randomly generated full name.
+            A fake first name.
         - 'birth_date' : str
             A birth date string in the format 'YYYY.MM.DD'.
     """
-    fake = Faker()
+    if fake is None:
+        fake = get_faker()
     fake_info_dict = {
-        "id_number": fake.numerify("###########"),
-        "surname": fake.name().split()[1],
-        "name": fake.name().split()[0],
+        "id_number": fake_identity_number(fake),
+        "surname": fake.last_name(),
+        "name": fake.first_name(),
         "birth_date": str(fake.date_of_birth()).replace("-", "."),
     }
 
     # for key, val in fake_info_dict.items():
     #     print(key, val)
-    return fake_info_dict
\ No newline at end of file
+    return fake_info_dict
+
+
+def create_fake_infos(seeds, fake=None):
+    """
+    Generate the fake identity information of many samples with one Faker instance.
+
+    Parameters
+    ----------
+    seeds : iterable of int
+        One seed per sample. The Faker instance is reseeded before each sample,
+        so every sample only depends on its own seed.
+    fake : Faker, optional
+        The Faker instance to draw values from. Defaults to the shared instance
+        from `get_faker`.
+
+    Returns
+    -------
+    list of dict
+        One dictionary per seed, in the format returned by `create_fake_info`.
+    """
+    if fake is None:
+        fake = get_faker()
+    fake_infos = []
+    for seed in seeds:
+        fake.seed_instance(seed)
+        fake_infos.append(create_fake_info(fake))
+    return fake_infos
\ No newline at end of file
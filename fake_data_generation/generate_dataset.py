@@ -0,0 +1,207 @@
+"""
+This script generates a large synthetic dataset in parallel, directly in the YOLO layout expected by `dataset.yaml`.
+
+The samples are split into shards of consecutive indices that are generated by a pool of worker processes.
+Every sample draws its fake information and its train/val assignment from a seed derived from the global
+seed and the sample index only, so the output is identical for a given seed whatever the number of workers.
+(Faker draws birth dates relative to the current date, so runs on different days differ in that field.)
+
+Usage (from the repository root):
+
+    python -m fake_data_generation.generate_dataset --count 100000 --seed 42 --workers 8
+
+Parameters:
+- `--count`: Number of samples to generate.
+- `--seed`: Global seed that makes the dataset reproducible.
+- `--workers`: Number of worker processes (defaults to the number of CPUs).
+- `--val-fraction`: Fraction of the samples written to the validation split.
+- `--output`: Dataset root. `images/{train,val}` and `labels/{train,val}` are created under it, along with
+  a `dataset.yaml` pointing to it.
+- `--start-index`: Index of the first sample, used as file name. Use it to append to an existing dataset
+  (e.g. `--output fake_generated_data --start-index 101`).
+- `--shard-size`: Number of samples generated per task.
+- `--augment`: Apply random rotation, perspective, lighting, blur and noise to every sample, with the boxes
+  transformed along (see `augment_utils.py`).
+- `--augment-config`: JSON file overriding entries of `DEFAULT_AUGMENTATION_CONFIG`. Implies `--augment`.
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from PIL import Image
+
+from fake_data_generation.augment_utils import augment
+from fake_data_generation.bbox_utils import xyxy2yolo
+from fake_data_generation.faker_utils import create_fake_infos
+from fake_data_generation.image_utils import draw_text_fields, initialize_template, save_template_image
+from fake_data_generation.txt_utils import save_yolo_label_shard
+
+SPLITS = ("train", "val")
+CLASS_NAMES = ("id_number", "surname", "name", "birth_date")
+
+
+def sample_seed(seed, index):
+    """
+    Derive the seed of one sample from the global seed and the sample index.
+
+    Parameters
+    ----------
+    seed : int
+        The global dataset seed.
+    index : int
+        The sample index.
+
+    Returns
+    -------
+    int
+        A 32-bit seed, independent of the shard and worker the sample ends up in.
+    """
+    return int(np.random.SeedSequence([seed, index]).generate_state(1)[0])
+
+
+def create_dataset_dirs(output):
+    """
+    Create the `images/{train,val}` and `labels/{train,val}` folders under `output`.
+    """
+    for split in SPLITS:
+        os.makedirs(os.path.join(output, "images", split), exist_ok=True)
+        os.makedirs(os.path.join(output, "labels", split), exist_ok=True)
+
+
+def write_dataset_yaml(output):
+    """
+    Write a `dataset.yaml` next to the generated data, in the format of the root `dataset.yaml`.
+    """
+    names = "\n".join(f"  {label}: {name}" for label, name in enumerate(CLASS_NAMES))
+    with open(os.path.join(output, "dataset.yaml"), "w") as fp:
+        fp.write(
+            f"path: {os.path.abspath(output)}\n\n"
+            "train: images/train\n"
+            "val: images/val\n\n"
+            f"names:\n{names}\n"
+        )
+
+
+def generate_shard(start, stop, seed, output, val_fraction, augment_config=None):
+    """
+    Generate the samples with indices in `[start, stop)`.
+
+    Parameters
+    ----------
+    start : int
+        First sample index of the shard.
+    stop : int
+        Index after the last sample of the shard.
+    seed : int
+        The global dataset seed.
+    output : str
+        Dataset root.
+    val_fraction : float
+        Fraction of the samples written to the validation split.
+    augment_config : dict, optional
+        Augmentation settings passed to `augment`. Samples are not augmented if None.
+
+    Returns
+    -------
+    dict
+        Number of samples written to each split.
+
+    Notes
+    -----
+    Images are saved as they are drawn, while the label boxes of the whole shard are
+    converted to YOLO format in one NumPy operation and written at the end.
+    """
+    counts = dict.fromkeys(SPLITS, 0)
+    seeds = [sample_seed(seed, index) for index in range(start, stop)]
+    fake_infos = create_fake_infos(seeds)
+    shard_labels, shard_boxes, image_sizes, box_counts, txt_file_paths = [], [], [], [], []
+
+    for index, seed_value, fake_info_dict in zip(range(start, stop), seeds, fake_infos):
+        rng = np.random.default_rng(seed_value)
+        split = "val" if rng.random() < val_fraction else "train"
+
+        # The template, font and Faker are loaded once per worker process and reused.
+        template_image, draw, fill, font, align = initialize_template()
+        labels, boxes = draw_text_fields(draw, fill, font, align, fake_info_dict)
+        if augment_config is not None:
+            image, labels, boxes = augment(
+                np.asarray(template_image), labels, boxes, rng, augment_config
+            )
+            template_image = Image.fromarray(image)
+        img_file_path = os.path.join(output, "images", split, f"{index}.png").replace("\\", "/")
+        save_template_image(template_image, img_file_path)
+
+        shard_labels.append(labels)
+        shard_boxes.append(boxes)
+        image_sizes.extend([template_image.size] * len(boxes))
+        box_counts.append(len(boxes))
+        txt_file_paths.append(
+            os.path.join(output, "labels", split, f"{index}.txt").replace("\\", "/")
+        )
+        counts[split] += 1
+
+    if txt_file_paths:
+        yolo_boxes = xyxy2yolo(np.array(image_sizes), np.concatenate(shard_boxes))
+        save_yolo_label_shard(
+            np.concatenate(shard_labels), yolo_boxes, box_counts, txt_file_paths
+        )
+
+    return counts
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate a synthetic identity card dataset in parallel.")
+    parser.add_argument("--count", type=int, required=True, help="Number of samples to generate.")
+    parser.add_argument("--seed", type=int, default=0, help="Global seed of the dataset.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes.")
+    parser.add_argument("--val-fraction", type=float, default=0.3, help="Fraction of validation samples.")
+    parser.add_argument(
+        "--output", default=os.path.join("fake_data_generation", "synthetic_data"), help="Dataset root."
+    )
+    parser.add_argument("--start-index", type=int, default=1, help="Index of the first sample.")
+    parser.add_argument("--shard-size", type=int, default=500, help="Samples generated per task.")
+    parser.add_argument("--augment", action="store_true", help="Augment every sample.")
+    parser.add_argument("--augment-config", default=None, help="JSON file of augmentation settings.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    create_dataset_dirs(args.output)
+
+    augment_config = None
+    if args.augment_config:
+        with open(args.augment_config) as fp:
+            augment_config = json.load(fp)
+    elif args.augment:
+        augment_config = {}
+
+    stop_index = args.start_index + args.count
+    shards = [
+        (start, min(start + args.shard_size, stop_index))
+        for start in range(args.start_index, stop_index, args.shard_size)
+    ]
+    totals = dict.fromkeys(SPLITS, 0)
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [
+            executor.submit(
+                generate_shard,
+                start,
+                stop,
+                args.seed,
+                args.output,
+                args.val_fraction,
+                augment_config,
+            )
+            for start, stop in shards
+        ]
+        for done, future in enumerate(as_completed(futures), start=1):
+            for split, count in future.result().items():
+                totals[split] += count
+            print(f"Shard {done}/{len(shards)} done ({totals['train']} train, {totals['val']} val)")
+
+    write_dataset_yaml(args.output)
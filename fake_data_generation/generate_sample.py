@@ -17,9 +17,13 @@ Parameters:
 - `txt_folder`: Folder to save YOLO label files.
 
 The resulting dataset will be used for training object detection.
+
+Usage (from the repository root):
+
+    python -m fake_data_generation.generate_sample
 """
 
-from image_utils import save, initialize_template
+from fake_data_generation.image_utils import save, initialize_template
 import os
 
 if __name__ == "__main__":
@@ -1,11 +1,12 @@
-from text_utils import load_img, load_text_info, load_texts_top_left_info
-from faker_utils import create_fake_info
-from bbox_utils import (
+from fake_data_generation.text_utils import load_img, load_text_info, load_texts_top_left_info
+from fake_data_generation.faker_utils import create_fake_info
+from fake_data_generation.bbox_utils import (
     xyxy2xywh,
+    xyxy2yolo,
     normalize_yolo_bbox_coordinates,
 )
 import numpy as np
-from txt_utils import save_yolo_labels_to_txt
+from fake_data_generation.txt_utils import save_yolo_label_array_to_txt
 
 
 def initialize_template():
@@ -164,7 +165,58 @@ def generate_labeled_yolo_bbox(
     return labeled_yolo_bbox_coordinate
 
 
-def process_draw(draw, template_image, fill, font, align):
+def draw_text_fields(draw, fill, font, align, fake_info_dict=None):
+    """
+    Write every identity field on the image and return their pixel bounding boxes.
+
+    Parameters
+    ----------
+    draw : ImageDraw.Draw
+        The draw object used to write the text.
+    fill : tuple
+        The color used for the text.
+    font : ImageFont
+        The font used for the text.
+    align : str
+        The alignment of the text.
+    fake_info_dict : dict, optional
+        The personal information to draw, as returned by `create_fake_info`. Generated
+        with `create_fake_info` if omitted.
+
+    Returns
+    -------
+    tuple
+        A tuple containing:
+        - labels : np.ndarray
+            (4,) integer class labels, in the order id_number, surname, name, birth_date.
+        - boxes : np.ndarray
+            (4, 4) bounding boxes in (x1, y1, x2, y2) pixel format, ready to be converted
+            in one call with `xyxy2yolo`.
+    """
+    if fake_info_dict is None:
+        fake_info_dict = create_fake_info()
+
+    id_number_top_left, surname_top_left, name_top_left, birth_date_top_left = (
+        load_texts_top_left_info()
+    )
+
+    text_fields = [
+        ("id_number", id_number_top_left, 0),
+        ("surname", surname_top_left, 1),
+        ("name", name_top_left, 2),
+        ("birth_date", birth_date_top_left, 3),
+    ]
+
+    boxes = []
+    for field, coords, _ in text_fields:
+        text_on_draw = write_text_to_draw(draw, coords, fake_info_dict[field], fill, font, align)
+        boxes.append(draw_bbox(text_on_draw, coords, fake_info_dict[field], font))
+
+    labels = np.array([label for _, _, label in text_fields])
+    return labels, np.array(boxes, dtype=np.float32)
+
+
+def process_draw(draw, template_image, fill, font, align, fake_info_dict=None):
     """
     Process the drawing of text and bounding boxes on the template image.
 
@@ -185,6 +237,9 @@ def process_draw(draw, template_image, fill, font, align):
         The font object to be used for the text.
     align : str
         The text alignment. The available alignment values are usually "left", "center", or "right".
+    fake_info_dict : dict, optional
+        The personal information to draw, as returned by `create_fake_info`. Generated
+        with `create_fake_info` if omitted.
 
     Returns
     -------
@@ -192,33 +247,16 @@ def process_draw(draw, template_image, fill, font, align):
         A list of YOLO-formatted bounding box coordinates with labels. Each entry in the list is a
         list of the format `[label, x_center, y_center, width, height]`, representing a bounding box
         for each text field.
-    """
-
-    fake_info_dict = create_fake_info()
-
-    id_number_top_left, surname_top_left, name_top_left, birth_date_top_left = (
-        load_texts_top_left_info()
-    )
 
-    text_fields = [
-        ("id_number", id_number_top_left, 0),
-        ("surname", surname_top_left, 1),
-        ("name", name_top_left, 2),
-        ("birth_date", birth_date_top_left, 3),
-    ]
+    Notes
+    -----
+    The four boxes are converted to YOLO format in one NumPy operation with `xyxy2yolo`.
+    """
+    labels, boxes = draw_text_fields(draw, fill, font, align, fake_info_dict)
+    yolo_boxes = xyxy2yolo(template_image.size, boxes)
 
     yolo_coordinates = [
-        generate_labeled_yolo_bbox(
-            draw,
-            coords,
-            fake_info_dict[field],
-            label,
-            template_image,
-            fill,
-            font,
-            align,
-        )
-        for field, coords, label in text_fields
+        [int(label), *yolo_box] for label, yolo_box in zip(labels, yolo_boxes.tolist())
     ]
     return yolo_coordinates
 
@@ -241,7 +279,9 @@ def save_template_image(template_image, img_file_path):
     template_image.save(img_file_path)
 
 
-def save(txt_file_path, img_file_path, template_image, draw, fill, font, align):
+def save(
+    txt_file_path, img_file_path, template_image, draw, fill, font, align, fake_info_dict=None
+):
     """
     Save the generated template image and corresponding YOLO labels to specified paths.
 
@@ -265,6 +305,8 @@ def save(txt_file_path, img_file_path, template_image, draw, fill, font, align):
         The font used for the text.
     align : str
         The text alignment.
+    fake_info_dict : dict, optional
+        The personal information to draw. See `process_draw`.
 
     Returns
     -------
@@ -274,14 +316,14 @@ def save(txt_file_path, img_file_path, template_image, draw, fill, font, align):
     
     Notes
     -----
-    - The function calls `process_draw` to draw the text on the image and to calculate the YOLO bounding box
-      coordinates for each piece of text.
-    - The YOLO label file is created using `save_yolo_labels_to_txt`, which writes the bounding box coordinates
-      to a text file in YOLO format.
+    - The function calls `draw_text_fields` to draw the text on the image and to calculate the bounding box
+      coordinates for each piece of text, then converts them to YOLO format at once with `xyxy2yolo`.
+    - The YOLO label file is created using `save_yolo_label_array_to_txt`, which writes the bounding box
+      coordinates to a text file in YOLO format.
     - The template image with text is saved as an image file  at the specified `img_file_path`.
     """
-    yolo_coordinates = process_draw(draw, template_image, fill, font, align)
-    save_yolo_labels_to_txt(yolo_coordinates, txt_file_path)
+    labels, boxes = draw_text_fields(draw, fill, font, align, fake_info_dict)
+    save_yolo_label_array_to_txt(labels, xyxy2yolo(template_image.size, boxes), txt_file_path)
     save_template_image(template_image, img_file_path)
 
 
@@ -1,12 +1,58 @@
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont
 
+TEMPLATE_PATH = "fake_data_generation/template.jpg"
+FONT_PATH = "fake_data_generation/Arial.ttf"
+
+
+@lru_cache(maxsize=None)
+def load_template(template_path=TEMPLATE_PATH):
+    """
+    Decode the template image once per process.
+
+    Parameters
+    ----------
+    template_path : str, optional
+        Path of the template image. Default is `TEMPLATE_PATH`.
+
+    Returns
+    -------
+    PIL.Image.Image
+        The decoded template. It is shared and must not be drawn on; use `load_img`
+        to get a copy.
+    """
+    template_image = Image.open(template_path)
+    template_image.load()
+    return template_image
+
+
+@lru_cache(maxsize=None)
+def load_font(font_path=FONT_PATH, size=25):
+    """
+    Load a TrueType font once per process.
+
+    Parameters
+    ----------
+    font_path : str, optional
+        Path of the font file. Default is `FONT_PATH`.
+    size : int, optional
+        Font size in points. Default is 25.
+
+    Returns
+    -------
+    PIL.ImageFont.FreeTypeFont
+        The loaded font.
+    """
+    return ImageFont.truetype(font_path, size)
+
 
 def load_img():
     """
     Load the template image and initialize the drawing context.
 
-    Opens a predefined image file to serve as the background for placing text 
-    and returns an image object along with a drawing object.
+    Copies the pixel buffer of the pristine template decoded by `load_template`
+    to serve as the background for placing text, and returns the copy along
+    with a drawing object.
 
     Returns
     -------
@@ -17,7 +63,7 @@ def load_img():
         - draw : PIL.ImageDraw.ImageDraw
             The drawing context used to place text on the image.
     """
-    template_image = Image.open("fake_data_generation/template.jpg")
+    template_image = load_template().copy()
     draw = ImageDraw.Draw(template_image)
     return template_image, draw
 
@@ -40,7 +86,7 @@ def load_text_info():
         - align : str
             The alignment of the text ('left' by default).
     """
-    font = ImageFont.truetype("fake_data_generation/Arial.ttf", 25)
+    font = load_font()
     color = (0, 0, 0)
     fill = color
     align = "left"
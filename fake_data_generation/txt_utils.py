@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def save_yolo_labels_to_txt(yolo_coordinates, txt_file_path):
     """
     Save YOLO format coordinates to a text file.
@@ -34,3 +37,58 @@ def save_yolo_labels_to_txt(yolo_coordinates, txt_file_path):
                 rounded_coordinates
             )  # Join the values with a space separator
             fp.write(line + "\n")
+
+
+YOLO_LABEL_FORMAT = "%d %.6f %.6f %.6f %.6f"
+
+
+def save_yolo_label_array_to_txt(labels, boxes, txt_file_path):
+    """
+    Save YOLO labels held in arrays to a text file with one formatting call.
+
+    Produces the same file as `save_yolo_labels_to_txt`, but formats every line at
+    once with `np.savetxt` instead of one f-string per value.
+
+    Parameters
+    ----------
+    labels : array-like
+        (N,) integer class labels.
+    boxes : array-like
+        (N, 4) normalized [x_center, y_center, width, height] boxes.
+    txt_file_path : str
+        The path where the text file containing the YOLO labels will be saved.
+
+    Returns
+    -------
+    None
+    """
+    rows = np.column_stack([np.asarray(labels), np.asarray(boxes).reshape(-1, 4)])
+    np.savetxt(txt_file_path, rows, fmt=YOLO_LABEL_FORMAT)
+
+
+def save_yolo_label_shard(labels, boxes, counts, txt_file_paths):
+    """
+    Save the YOLO labels of many images, converted together, to one file per image.
+
+    Parameters
+    ----------
+    labels : array-like
+        (N,) integer class labels of every box of the shard, image after image.
+    boxes : array-like
+        (N, 4) normalized boxes of the shard, in the same order.
+    counts : list of int
+        Number of boxes of each image.
+    txt_file_paths : list of str
+        Label file path of each image.
+
+    Returns
+    -------
+    None
+    """
+    split_points = np.cumsum(counts)[:-1]
+    for image_labels, image_boxes, txt_file_path in zip(
+        np.split(np.asarray(labels), split_points),
+        np.split(np.asarray(boxes), split_points),
+        txt_file_paths,
+    ):
+        save_yolo_label_array_to_txt(image_labels, image_boxes, txt_file_path)